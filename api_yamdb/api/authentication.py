@@ -0,0 +1,104 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication,
+    JWTTokenUserAuthentication,
+)
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .cache import shared_cache
+
+USER_CLAIMS = ("username", "role", "is_superuser")
+# iat хранит целые секунды: токен, полученный в ту же секунду после
+# отзыва, по нему неотличим от отозванного
+ISSUED_AT_CLAIM = "iat_ns"
+REVOCATION_KEY = "jwt-revoked:{}"
+NOT_CHECKED = object()
+
+
+def local_revocations():
+    """Кэш отзывов в памяти процесса: CACHES["local"]."""
+    return caches["local"]
+
+
+def revoke_tokens(user_id):
+    """Отзывает все токены пользователя, выданные до текущего момента."""
+    if settings.JWT_REVOCATION_CACHE:
+        key = REVOCATION_KEY.format(user_id)
+        revoked_at = time.time_ns()
+        shared_cache().set(
+            key,
+            revoked_at,
+            api_settings.ACCESS_TOKEN_LIFETIME.total_seconds(),
+        )
+        local_revocations().set(
+            key, revoked_at, settings.JWT_REVOCATION_CHECK_SECONDS
+        )
+
+
+def get_revoked_at(user_id):
+    """Время последнего отзыва токенов пользователя или None.
+
+    Ответ общего кэша, в том числе его отсутствие, запоминается в
+    памяти процесса на JWT_REVOCATION_CHECK_SECONDS.
+    """
+    key = REVOCATION_KEY.format(user_id)
+    revoked_at = local_revocations().get(key, NOT_CHECKED)
+    if revoked_at is NOT_CHECKED:
+        revoked_at = shared_cache().get(key)
+        local_revocations().set(
+            key, revoked_at, settings.JWT_REVOCATION_CHECK_SECONDS
+        )
+    return revoked_at
+
+
+def is_revoked(validated_token):
+    if not settings.JWT_REVOCATION_CACHE:
+        return False
+    revoked_at = get_revoked_at(validated_token[api_settings.USER_ID_CLAIM])
+    if revoked_at is None:
+        return False
+    issued_at = validated_token.get(
+        ISSUED_AT_CLAIM, validated_token["iat"] * 10 ** 9
+    )
+    return issued_at <= revoked_at
+
+
+class UserClaimsRefreshToken(RefreshToken):
+    """Refresh-токен, который переносит роль пользователя в access-токен."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ISSUED_AT_CLAIM] = time.time_ns()
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class RoleTokenUser(TokenUser):
+    @cached_property
+    def role(self):
+        return self.token["role"]
+
+
+class StatelessJWTAuthentication(JWTTokenUserAuthentication):
+    """Собирает пользователя из claims токена без запроса к БД.
+
+    Токены без claims роли (выданные в обход `TokenObtainView`)
+    по-прежнему проверяются по таблице пользователей.
+    """
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in USER_CLAIMS):
+            return JWTAuthentication.get_user(self, validated_token)
+        if is_revoked(validated_token):
+            raise InvalidToken(_("Token has been revoked"))
+        return super().get_user(validated_token)
@@ -0,0 +1,331 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import (
+    http_date,
+    parse_http_date_safe,
+    quote_etag,
+    urlencode,
+)
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.request import Request
+
+from .pagination import ModifiedPageNumberPagination
+
+STAMP_KEY = "api-cache-stamp:{}"
+RESPONSE_KEY = "api-cache-response:{}"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def shared_cache():
+    """Кэш, общий для всех процессов: CACHES["shared"]."""
+    return caches["shared"]
+
+
+def stamp_key(model):
+    return STAMP_KEY.format(model._meta.label_lower)
+
+
+class StampBump:
+    """Сдвиг отметок, ожидающий фиксации транзакции."""
+
+    def __init__(self, models):
+        self.models = set(models)
+
+    def __call__(self):
+        shared_cache().set_many(
+            {stamp_key(model): time.time_ns() for model in self.models},
+            None,
+        )
+
+
+def touch(*models, using=DEFAULT_DB_ALIAS):
+    """Отмечает изменение моделей: зависящие от них ответы устаревают.
+
+    Отметка сдвигается после фиксации транзакции: иначе параллельный
+    запрос успел бы прочитать старые данные и сохранить их в кэше под
+    новой отметкой. Все изменения одной транзакции сдвигаются одной
+    записью в общий кэш.
+    """
+    for _, callback in connections[using].run_on_commit:
+        if isinstance(callback, StampBump):
+            callback.models.update(models)
+            return
+    transaction.on_commit(StampBump(models), using=using)
+
+
+def get_stamps(models):
+    """Возвращает отметки последнего изменения моделей.
+
+    Отметка, вытесненная из кэша, создаётся заново текущим временем,
+    поэтому ключ ответа никогда не совпадёт со старым.
+    """
+    shared = shared_cache()
+    keys = [stamp_key(model) for model in models]
+    stamps = shared.get_many(keys)
+    for key in keys:
+        if key not in stamps:
+            shared.add(key, time.time_ns(), None)
+            stamps[key] = shared.get(key)
+    return [stamps[key] for key in keys]
+
+
+def normalize_query(query_dict):
+    return urlencode(
+        sorted(
+            (key, value)
+            for key, values in query_dict.lists()
+            for value in values
+        )
+    )
+
+
+def cache_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def count(view_name, result):
+    with _stats_lock:
+        _stats[(view_name, result)] += 1
+
+
+class ModelStampsMixin:
+    cache_models = ()
+
+    def get_cache_stamps(self):
+        if not hasattr(self, "_cache_stamps"):
+            self._cache_stamps = get_stamps(self.cache_models)
+        return self._cache_stamps
+
+    def get_representation_digest(self, request, renderer_format):
+        parts = [
+            type(self).__name__,
+            request.get_host(),
+            request.path,
+            normalize_query(request.GET),
+            renderer_format,
+            *map(str, self.get_cache_stamps()),
+        ]
+        return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 Not Modified, не выполняя сериализацию.
+
+    Валидаторы — наибольшее значение поля modified и число объектов,
+    попадающих в ответ. Обычный ответ получает их без лишних запросов:
+    страница читает их вместе с COUNT, объект — из своей строки.
+    Отдельный запрос валидаторов выполняется, только если клиент
+    прислал If-None-Match или If-Modified-Since, и идёт в initial, то
+    есть после аутентификации и проверки прав. Курсорная страница без
+    условных заголовков валидаторов не получает: COUNT она не читает.
+    """
+
+    conditional_actions = ("list", "retrieve")
+    pagination_class = ModifiedPageNumberPagination
+    validators = None
+
+    def is_conditional(self, request):
+        return (
+            request.method in ("GET", "HEAD")
+            and self.action in self.conditional_actions
+        )
+
+    def get_validator_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        return queryset
+
+    def make_validators(self, request, modified, count):
+        """Возвращает ETag и Last-Modified или None для пустого ответа."""
+        if modified is None:
+            return None
+        parts = [
+            type(self).__name__,
+            request.get_host(),
+            request.path,
+            normalize_query(request.GET),
+            request.accepted_renderer.format,
+            modified.isoformat(),
+            str(count),
+        ]
+        etag = quote_etag(hashlib.md5("|".join(parts).encode()).hexdigest())
+        return etag, int(modified.timestamp())
+
+    def get_validators(self, request):
+        state = (
+            self.get_validator_queryset()
+            .order_by()
+            .aggregate(modified=Max("modified"), count=Count("pk"))
+        )
+        return self.make_validators(
+            request, state["modified"], state["count"]
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not self.is_conditional(request) or not (
+            "HTTP_IF_NONE_MATCH" in request.META
+            or "HTTP_IF_MODIFIED_SINCE" in request.META
+        ):
+            return
+        self.validators = self.get_validators(request)
+        if self.validators is None:
+            return
+        etag, last_modified = self.validators
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            raise NotModified(response)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        get_state = getattr(self.paginator, "get_validator_state", None)
+        if (
+            page is not None
+            and get_state is not None
+            and self.validators is None
+            and self.is_conditional(self.request)
+        ):
+            self.validators = self.make_validators(self.request, *get_state())
+        return page
+
+    def get_object(self):
+        obj = super().get_object()
+        if self.validators is None and self.is_conditional(self.request):
+            self.validators = self.make_validators(
+                self.request, obj.modified, 1
+            )
+        return obj
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if self.validators is not None and response.status_code in (
+            200,
+            304,
+        ):
+            etag, last_modified = self.validators
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+
+class CachedResponseMixin(ModelStampsMixin):
+    """Кэширует ответы на анонимные GET-запросы.
+
+    Ключ строится из адреса запроса, отсортированных параметров,
+    выбранного формата ответа и отметок изменения `cache_models`,
+    которые сдвигаются сигналами.
+    Ответ, прочитанный с реплики сразу после записи, не сохраняется:
+    под новыми отметками оказались бы старые данные.
+    """
+
+    def is_cacheable(self, request):
+        return (
+            settings.API_CACHE_ENABLED
+            and request.method == "GET"
+            and "HTTP_AUTHORIZATION" not in request.META
+        )
+
+    def get_renderer_format(self, request, format_suffix=None):
+        """Формат, который выберет согласование содержимого, или None.
+
+        Кэш читается до того, как DRF выберет рендерер, поэтому выбор
+        повторяется здесь по Accept и `?format=`: JSON и HTML-страница
+        browsable API хранятся под разными ключами.
+        """
+        try:
+            renderer, _ = self.get_content_negotiator().select_renderer(
+                Request(request), self.get_renderers(), format_suffix
+            )
+        except NotAcceptable:
+            return None
+        return renderer.format
+
+    def get_cache_key(self, request, renderer_format):
+        return RESPONSE_KEY.format(
+            self.get_representation_digest(request, renderer_format)
+        )
+
+    def get_cached_conditional_response(self, request, headers):
+        """304 по валидаторам, сохранённым вместе с ответом."""
+        headers = dict(headers)
+        response = get_conditional_response(
+            request,
+            etag=headers.get("ETag"),
+            last_modified=parse_http_date_safe(
+                headers.get("Last-Modified", "")
+            ),
+        )
+        if response is not None:
+            for header in ("ETag", "Last-Modified"):
+                if header in headers:
+                    response[header] = headers[header]
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        renderer_format = None
+        if self.is_cacheable(request):
+            renderer_format = self.get_renderer_format(
+                request, kwargs.get(self.settings.FORMAT_SUFFIX_KWARG)
+            )
+        if renderer_format is None:
+            return super().dispatch(request, *args, **kwargs)
+        view_name = type(self).__name__
+        key = self.get_cache_key(request, renderer_format)
+        cached = cache.get(key)
+        if cached is not None:
+            count(view_name, "hit")
+            content, headers = cached
+            response = self.get_cached_conditional_response(request, headers)
+            if response is not None:
+                return response
+            response = HttpResponse(content)
+            for header, value in headers:
+                response[header] = value
+            response["X-Cache"] = "HIT"
+            return response
+
+        count(view_name, "miss")
+        response = super().dispatch(request, *args, **kwargs)
+        if (
+            response.status_code == 200
+            and hasattr(response, "render")
+            and not getattr(request, "replica_may_lag", False)
+        ):
+            response.render()
+            cache.set(
+                key,
+                (response.content, list(response.items())),
+                settings.API_CACHE_TIMEOUT,
+            )
+        response["X-Cache"] = "MISS"
+        return response
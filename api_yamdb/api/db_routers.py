@@ -0,0 +1,36 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+# app_label модели, через которую DatabaseCache обращается к таблице
+CACHE_APP_LABEL = "django_cache"
+
+_read_from_replica = ContextVar("read_from_replica", default=False)
+
+
+def reading_from_replica():
+    return _read_from_replica.get()
+
+
+class ReplicaRouter:
+    """Направляет чтение на реплику, если это разрешил ReadReplicaMiddleware.
+
+    Запись, миграции и запросы вне HTTP (команды, воркеры) всегда
+    идут в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = settings.READ_REPLICA_ALIAS
+        if model._meta.app_label == CACHE_APP_LABEL:
+            # общий кэш в БД должен читаться без отставания реплики
+            return None
+        if reading_from_replica() and alias in connections.databases:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -1,6 +1,8 @@
 import django_filters
+from rest_framework import filters
 
 from reviews.models import Title
+from reviews.search import get_search_backend
 
 
 class TitleFilter(django_filters.FilterSet):
@@ -10,7 +12,32 @@ class TitleFilter(django_filters.FilterSet):
         field_name="name", lookup_expr="icontains"
     )
     year = django_filters.NumberFilter(field_name="year")
+    search = django_filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Title
-        fields = ["category", "genre", "name", "year"]
+        fields = ["category", "genre", "name", "year", "search"]
+
+    def filter_search(self, queryset, name, value):
+        return get_search_backend().search(queryset, value)
+
+
+class TieBreakOrderingFilter(filters.OrderingFilter):
+    """Сортировка по `?ordering=`, последним ключом всегда идёт id.
+
+    id в том же направлении, что и последний ключ, делает порядок
+    однозначным и совпадает с индексами (поле, id). Без параметра
+    queryset не пересортировывается: порядок задают представление или
+    поиск.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering or ordering[-1].lstrip("-") in ("id", "pk"):
+            return ordering
+        return [*ordering, "-id" if ordering[-1].startswith("-") else "id"]
+
+    def filter_queryset(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param):
+            return queryset
+        return super().filter_queryset(request, queryset, view)
@@ -0,0 +1,167 @@
+import re
+from typing import NamedTuple
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from api.serializers import LeaderboardQuerySerializer
+from api.views import (
+    CategoryViewSet,
+    CommentViewSet,
+    GenreViewSet,
+    ReviewViewSet,
+    TitleViewSet,
+)
+from reviews.models import Review, TitleRanking
+
+# Полный просмотр таблицы без условия, но с ORDER BY по первичному ключу
+# и LIMIT страницы, дешёв: такие таблицы перечислены в allowed_scans.
+FULL_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"\bSCAN (?:TABLE )?(\w+)\b(?! USING| VIRTUAL)"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+SORT_PATTERNS = {
+    "sqlite": re.compile(r"USE TEMP B-TREE FOR ORDER BY"),
+    "postgresql": re.compile(r"^\s*->\s*Sort\b|^Sort\b", re.MULTILINE),
+}
+
+
+class HotPath(NamedTuple):
+    label: str
+    queryset: QuerySet
+    allowed_scans: tuple = ()
+    allow_sort: bool = False
+
+
+def viewset_queryset(viewset, params=None, **kwargs):
+    request = Request(RequestFactory().get("/", params or {}))
+    view = viewset(
+        request=request,
+        args=(),
+        kwargs=kwargs,
+        format_kwarg=None,
+        action="list",
+    )
+    return view.filter_queryset(view.get_queryset())
+
+
+def hot_paths():
+    yield HotPath(
+        "TitleViewSet.list",
+        viewset_queryset(TitleViewSet),
+        allowed_scans=("reviews_title",),
+    )
+    yield HotPath(
+        "TitleViewSet.list ?category=",
+        viewset_queryset(TitleViewSet, {"category": "movie"}),
+    )
+    # Сортируются только произведения одного жанра, найденные по
+    # покрывающему индексу (genre_id, title_id).
+    yield HotPath(
+        "TitleViewSet.list ?genre=",
+        viewset_queryset(TitleViewSet, {"genre": "drama"}),
+        allow_sort=True,
+    )
+    yield HotPath(
+        "TitleViewSet.list ?year=",
+        viewset_queryset(TitleViewSet, {"year": 1994}),
+    )
+    for field in TitleViewSet.ordering_fields:
+        for ordering in (field, f"-{field}"):
+            yield HotPath(
+                f"TitleViewSet.list ?ordering={ordering}",
+                viewset_queryset(TitleViewSet, {"ordering": ordering}),
+            )
+    # Результаты поиска упорядочены по релевантности.
+    yield HotPath(
+        "TitleViewSet.list ?search=",
+        viewset_queryset(TitleViewSet, {"search": "побег"}),
+        allow_sort=True,
+    )
+    for order, ordering in LeaderboardQuerySerializer.ORDERINGS.items():
+        yield HotPath(
+            f"TitleViewSet.top ?order={order}",
+            TitleRanking.objects.filter(
+                scope=TitleRanking.GENRE, scope_key=1
+            ).order_by(*ordering),
+        )
+    yield HotPath(
+        "ReviewViewSet.list",
+        viewset_queryset(ReviewViewSet, title_id=1),
+    )
+    yield HotPath(
+        "ReviewSerializer.validate",
+        Review.objects.filter(title_id=1, author_id=1),
+    )
+    yield HotPath(
+        "CommentViewSet.list",
+        viewset_queryset(CommentViewSet, title_id=1, review_id=1),
+    )
+    yield HotPath(
+        "GenreViewSet.list",
+        viewset_queryset(GenreViewSet),
+        allowed_scans=("reviews_genre",),
+    )
+    yield HotPath(
+        "CategoryViewSet.list",
+        viewset_queryset(CategoryViewSet),
+        allowed_scans=("reviews_category",),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Показывает планы запросов горячих путей API и сообщает "
+        "о полных просмотрах таблиц и сортировках без индекса."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=15,
+            help="LIMIT, с которым объясняются запросы списков.",
+        )
+        parser.add_argument(
+            "--no-fail",
+            action="store_true",
+            help="Не завершаться с ошибкой при найденных проблемах.",
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        scan_pattern = FULL_SCAN_PATTERNS.get(vendor)
+        sort_pattern = SORT_PATTERNS.get(vendor)
+        problems = []
+        for path in hot_paths():
+            plan = path.queryset[: options["page_size"]].explain()
+            found = []
+            if scan_pattern:
+                found += [
+                    f"полный просмотр {table}"
+                    for table in scan_pattern.findall(plan)
+                    if table not in path.allowed_scans
+                ]
+            if (
+                sort_pattern
+                and not path.allow_sort
+                and sort_pattern.search(plan)
+            ):
+                found.append("сортировка без индекса")
+            status = (
+                self.style.ERROR("; ".join(found))
+                if found
+                else self.style.SUCCESS("OK")
+            )
+            self.stdout.write(f"{path.label}: {status}")
+            if options["verbosity"] > 1 or found:
+                self.stdout.write(plan)
+            problems += [f"{path.label}: {problem}" for problem in found]
+
+        if problems and not options["no_fail"]:
+            raise CommandError(
+                "Найдены неэффективные планы запросов:\n" + "\n".join(problems)
+            )
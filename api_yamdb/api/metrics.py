@@ -0,0 +1,151 @@
+import math
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .cache import cache_stats
+
+QUANTILES = (0.5, 0.95, 0.99)
+METRICS = (
+    ("wall", "api_request_duration_seconds", "Время обработки запроса."),
+    ("db", "api_db_duration_seconds", "Время запросов к БД."),
+    ("queries", "api_db_queries", "Количество запросов к БД."),
+    ("serializer", "api_serializer_duration_seconds", "Время сериализации."),
+)
+
+_current_timing = ContextVar("current_timing", default=None)
+_samples = defaultdict(deque)
+_sums = Counter()
+_counts = Counter()
+_lock = threading.Lock()
+
+
+class RequestTiming:
+    """Замеры одного запроса: вызывается как execute_wrapper соединения."""
+
+    def __init__(self):
+        self.view = "unresolved"
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    @contextmanager
+    def serializing_block(self):
+        self.serializing = True
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.serializer += time.perf_counter() - started
+            self.serializing = False
+
+
+@contextmanager
+def track(timing):
+    token = _current_timing.set(timing)
+    try:
+        yield timing
+    finally:
+        _current_timing.reset(token)
+
+
+class TimedRepresentationMixin:
+    """Учитывает время сериализации в замерах текущего запроса.
+
+    Вложенные сериализаторы не замеряются отдельно: время входит во
+    внешний вызов. Запросы к БД из сериализатора входят в оба замера.
+    """
+
+    def to_representation(self, instance):
+        timing = _current_timing.get()
+        if timing is None or timing.serializing:
+            return super().to_representation(instance)
+        with timing.serializing_block():
+            return super().to_representation(instance)
+
+
+def record(timing, wall):
+    values = {
+        "wall": wall,
+        "db": timing.db,
+        "queries": timing.queries,
+        "serializer": timing.serializer,
+    }
+    window = settings.REQUEST_METRICS_WINDOW
+    with _lock:
+        _counts[timing.view] += 1
+        for metric, value in values.items():
+            samples = _samples[(timing.view, metric)]
+            if samples.maxlen != window:
+                samples = _samples[(timing.view, metric)] = deque(
+                    samples, maxlen=window
+                )
+            samples.append(value)
+            _sums[(timing.view, metric)] += value
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _sums.clear()
+        _counts.clear()
+
+
+def quantile(values, q):
+    return values[max(math.ceil(q * len(values)) - 1, 0)]
+
+
+def escape(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def render_prometheus():
+    """Метрики в текстовом формате Prometheus.
+
+    Квантили считаются по последним REQUEST_METRICS_WINDOW замерам
+    представления, _sum и _count — за всё время работы процесса.
+    """
+    with _lock:
+        samples = {key: sorted(values) for key, values in _samples.items()}
+        sums = dict(_sums)
+        counts = dict(_counts)
+    lines = []
+    for metric, name, description in METRICS:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} summary")
+        for view in sorted(counts):
+            label = f'view="{escape(view)}"'
+            values = samples[(view, metric)]
+            for q in QUANTILES:
+                lines.append(
+                    f'{name}{{{label},quantile="{q}"}} '
+                    f"{quantile(values, q)}"
+                )
+            lines.append(f"{name}_sum{{{label}}} {sums[(view, metric)]}")
+            lines.append(f"{name}_count{{{label}}} {counts[view]}")
+    name = "api_cache_requests_total"
+    lines.append(f"# HELP {name} Обращения к кэшу ответов.")
+    lines.append(f"# TYPE {name} counter")
+    for (view, result), value in sorted(cache_stats().items()):
+        lines.append(
+            f'{name}{{view="{escape(view)}",result="{result}"}} {value}'
+        )
+    return "\n".join(lines) + "\n"
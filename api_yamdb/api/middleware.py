@@ -0,0 +1,133 @@
+import hashlib
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from . import metrics
+from .cache import shared_cache
+from .db_routers import _read_from_replica
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+PIN_KEY = "replica-pin:{}"
+RECENT_WRITE_KEY = "replica-recent-write"
+
+
+class ReadReplicaMiddleware:
+    """Отправляет безопасные запросы на реплику.
+
+    После успешной записи запросы с тем же токеном ещё
+    REPLICA_PIN_SECONDS читают из основной базы, чтобы автор сразу
+    видел свои изменения. Остальные в это время читают с реплики, но
+    с пометкой request.replica_may_lag: отметки кэша уже сдвинуты, а
+    реплика может отставать, и такие ответы не сохраняются в кэше.
+    Закрепления хранятся в общем кэше, их видят все процессы.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def get_pin_key(self, request):
+        authorization = request.META.get("HTTP_AUTHORIZATION")
+        if not authorization:
+            return None
+        digest = hashlib.sha256(authorization.encode()).hexdigest()
+        return PIN_KEY.format(digest)
+
+    def __call__(self, request):
+        request.replica_may_lag = False
+        if settings.READ_REPLICA_ALIAS not in connections.databases:
+            return self.get_response(request)
+        pin_key = self.get_pin_key(request)
+        is_safe = request.method in SAFE_METHODS
+        from_replica = False
+        if is_safe:
+            pins = shared_cache().get_many(
+                [key for key in (pin_key, RECENT_WRITE_KEY) if key]
+            )
+            from_replica = pin_key not in pins
+            request.replica_may_lag = from_replica and RECENT_WRITE_KEY in pins
+        token = _read_from_replica.set(from_replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_from_replica.reset(token)
+        if not is_safe and response.status_code < 400:
+            pins = {RECENT_WRITE_KEY: True}
+            if pin_key:
+                pins[pin_key] = True
+            shared_cache().set_many(pins, settings.REPLICA_PIN_SECONDS)
+        return response
+
+
+class RequestMetricsMiddleware:
+    """Замеряет запрос: представление, запросы к БД, сериализацию.
+
+    Итог отдаётся в заголовке Server-Timing и копится в api.metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def get_view_name(self, view_func, method):
+        cls = getattr(view_func, "cls", None) or getattr(
+            view_func, "view_class", None
+        )
+        if cls is None:
+            return f"{view_func.__module__}.{view_func.__name__}"
+        actions = getattr(view_func, "actions", None) or {}
+        return f"{cls.__name__}.{actions.get(method, method)}"
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = getattr(request, "timing", None)
+        if timing is not None:
+            timing.view = self.get_view_name(
+                view_func, request.method.lower()
+            )
+
+    def __call__(self, request):
+        if not settings.REQUEST_METRICS_ENABLED:
+            return self.get_response(request)
+        timing = request.timing = metrics.RequestTiming()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timing))
+            with metrics.track(timing):
+                response = self.get_response(request)
+        wall = time.perf_counter() - started
+        metrics.record(timing, wall)
+        response["Server-Timing"] = (
+            f'db;dur={timing.db * 1000:.1f};desc="{timing.queries} queries", '
+            f"ser;dur={timing.serializer * 1000:.1f}, "
+            f"total;dur={wall * 1000:.1f}"
+        )
+        return response
+
+
+class QueryInspectionMiddleware:
+    """Подключает QUERY_INSPECTORS к соединениям на время запроса.
+
+    Включается настройкой QUERY_INSPECTION_ENABLED: по умолчанию в
+    режиме DEBUG и в тестах.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_INSPECTION_ENABLED:
+            return self.get_response(request)
+        inspectors = [
+            import_string(path)(request) for path in settings.QUERY_INSPECTORS
+        ]
+        with ExitStack() as stack:
+            for connection in connections.all():
+                for inspector in inspectors:
+                    stack.enter_context(connection.execute_wrapper(inspector))
+            response = self.get_response(request)
+        for inspector in inspectors:
+            inspector.finish(response)
+        return response
@@ -1,11 +1,182 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.mixins import (
     CreateModelMixin,
     DestroyModelMixin,
     ListModelMixin,
 )
+from rest_framework.response import Response
+
+from reviews.models import User
+
+from .serializers import AuthorSerializer
 
 
 class CreateListDestroyModelMixin(
     CreateModelMixin, DestroyModelMixin, ListModelMixin
 ):
     pass
+
+
+class CursorPaginationMixin:
+    """Позволяет клиенту выбрать курсорную пагинацию.
+
+    Режим включается параметром `?pagination=cursor`; ссылки `next` и
+    `previous` сохраняют его вместе с параметром `cursor`.
+    """
+
+    cursor_pagination_class = None
+    pagination_mode_param = "pagination"
+
+    def use_cursor_pagination(self):
+        params = self.request.query_params
+        return (
+            params.get(self.pagination_mode_param) == "cursor"
+            or "cursor" in params
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.use_cursor_pagination():
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+
+class SparseFieldsetMixin:
+    """Параметры `?fields=` и `?expand=` для list и retrieve.
+
+    `fields` оставляет в ответе перечисленные поля, `expand` раскрывает
+    связи из `Meta.expandable_fields` сериализатора во вложенные
+    объекты. Оба набора передаются сериализатору в контексте, а
+    get_queryset по is_field_requested загружает только нужные столбцы
+    и связи.
+    """
+
+    sparse_actions = ("list", "retrieve")
+
+    @staticmethod
+    def split_names(value):
+        return {name.strip() for name in value.split(",") if name.strip()}
+
+    def get_sparse_fieldset(self):
+        """Возвращает (fields, expand); fields — None без ограничения."""
+        if not hasattr(self, "_sparse_fieldset"):
+            self._sparse_fieldset = self.parse_sparse_fieldset()
+        return self._sparse_fieldset
+
+    def parse_sparse_fieldset(self):
+        if self.action not in self.sparse_actions:
+            return None, set()
+        meta = self.get_serializer_class().Meta
+        expandable = set(getattr(meta, "expandable_fields", {}))
+        params = self.request.query_params
+        fields = self.split_names(params.get("fields", ""))
+        expand = self.split_names(params.get("expand", ""))
+        errors = {}
+        unknown = fields - set(meta.fields) - expandable
+        if unknown:
+            errors["fields"] = [
+                f"Неизвестные поля: {', '.join(sorted(unknown))}."
+            ]
+        unknown = expand - expandable
+        if unknown:
+            errors["expand"] = [
+                f"Нельзя раскрыть: {', '.join(sorted(unknown))}."
+            ]
+        if errors:
+            raise ValidationError(errors)
+        return fields or None, expand
+
+    def is_field_requested(self, name):
+        fields, expand = self.get_sparse_fieldset()
+        return fields is None or name in fields or name in expand
+
+    def is_field_expanded(self, name):
+        return name in self.get_sparse_fieldset()[1]
+
+    def get_serializer_context(self):
+        fields, expand = self.get_sparse_fieldset()
+        return {
+            **super().get_serializer_context(),
+            "fields": fields,
+            "expand": expand,
+        }
+
+
+class AuthoredSparseFieldsetMixin(SparseFieldsetMixin):
+    """Загружает автора в объёме, который нужен сериализатору."""
+
+    def with_author(self, queryset, columns):
+        if not self.is_field_requested("author"):
+            return queryset.only(*columns)
+        if self.is_field_expanded("author"):
+            author_fields = AuthorSerializer.Meta.fields
+        else:
+            author_fields = ("username",)
+        return queryset.select_related("author").only(
+            *columns,
+            "author",
+            *(f"author__{name}" for name in author_fields),
+        )
+
+
+class NestedParentMixin:
+    """Находит родительский объект вложенного маршрута один раз за запрос.
+
+    `parent_lookup` сопоставляет поля `parent_model` параметрам URL.
+    """
+
+    parent_model = None
+    parent_lookup = {}
+
+    def get_parent(self):
+        if not hasattr(self, "_parent"):
+            self._parent = get_object_or_404(
+                self.parent_model,
+                **{
+                    field: self.kwargs[kwarg]
+                    for field, kwarg in self.parent_lookup.items()
+                },
+            )
+        return self._parent
+
+    def list(self, request, *args, **kwargs):
+        self.get_parent()
+        return super().list(request, *args, **kwargs)
+
+
+class BulkCreateMixin:
+    """Добавляет маршрут `POST .../bulk/` для создания списка объектов.
+
+    Общие для всех объектов поля сохранения задаёт get_bulk_save_kwargs.
+    """
+
+    def get_bulk_save_kwargs(self):
+        return {}
+
+    @action(detail=False, methods=["post"], url_path="bulk", url_name="bulk")
+    def bulk(self, request, *args, **kwargs):
+        save_kwargs = self.get_bulk_save_kwargs()
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(**save_kwargs)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class AuthoredBulkCreateMixin(BulkCreateMixin):
+    """Пакетное создание, где автор всех объектов — текущий пользователь."""
+
+    def get_bulk_save_kwargs(self):
+        return {
+            **super().get_bulk_save_kwargs(),
+            "author": User.objects.only("username").get(
+                pk=self.request.user.id
+            ),
+        }
@@ -0,0 +1,54 @@
+from django.core.paginator import Paginator
+from django.db.models import Count, Max
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ModifiedPaginator(Paginator):
+    """Вместе с числом объектов читает наибольшее значение modified.
+
+    Оба значения берутся одним запросом вместо COUNT, поэтому валидаторы
+    условного GET для страницы не стоят отдельного запроса.
+    """
+
+    modified = None
+
+    @cached_property
+    def count(self):
+        state = self.object_list.order_by().aggregate(
+            count=Count("pk"), modified=Max("modified")
+        )
+        self.modified = state["modified"]
+        return state["count"]
+
+
+class ModifiedPageNumberPagination(PageNumberPagination):
+    django_paginator_class = ModifiedPaginator
+
+    def get_validator_state(self):
+        """(наибольший modified, число объектов) по всем страницам."""
+        paginator = self.page.paginator
+        return paginator.modified, paginator.count
+
+
+class TitleCursorPagination(CursorPagination):
+    ordering = "-id"
+
+    def get_ordering(self, request, queryset, view):
+        # позиция курсора хранит только id, поэтому ?ordering= доступен
+        # лишь с постраничной пагинацией
+        if request.query_params.get("ordering"):
+            raise ValidationError(
+                {
+                    "ordering": [
+                        "С курсорной пагинацией доступен только порядок "
+                        "по умолчанию."
+                    ]
+                }
+            )
+        return (self.ordering,)
+
+
+class PubDateCursorPagination(CursorPagination):
+    ordering = ("-pub_date", "id")
@@ -20,7 +20,7 @@ class AdminModeratorOrReadOnly(permissions.BasePermission):
             return True
         return (
             request.user.role in (ADMIN, MODERATOR)
-            or obj.author == request.user
+            or obj.author_id == request.user.id
         )
 
 
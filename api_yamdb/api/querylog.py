@@ -0,0 +1,118 @@
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from rest_framework.fields import Field
+
+logger = logging.getLogger("api.queries")
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+IN_LIST_RE = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+# кадры обёрток execute_wrapper не указывают на источник запроса
+WRAPPER_FILES = {
+    os.path.join(os.path.dirname(__file__), name)
+    for name in ("querylog.py", "metrics.py", "middleware.py")
+}
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def normalize_sql(sql):
+    """Приводит запросы, отличающиеся только значениями, к одному виду."""
+    sql = STRING_RE.sub("?", sql.replace("%s", "?"))
+    sql = NUMBER_RE.sub("?", sql)
+    sql = IN_LIST_RE.sub("(...)", sql)
+    return " ".join(sql.split())
+
+
+def describe_field(field):
+    while not field.field_name and field.parent is not None:
+        field = field.parent
+    if field.parent is None:
+        return type(field).__name__
+    return f"{type(field.parent).__name__}.{field.field_name}"
+
+
+def find_origin():
+    """Поле сериализатора и строка проекта, из которых выполнен запрос."""
+    field = location = None
+    frame = sys._getframe(1)
+    while frame is not None and (field is None or location is None):
+        code = frame.f_code
+        if field is None and isinstance(frame.f_locals.get("self"), Field):
+            field = describe_field(frame.f_locals["self"])
+        if (
+            location is None
+            and code.co_filename.startswith(settings.BASE_DIR)
+            and code.co_filename not in WRAPPER_FILES
+        ):
+            path = os.path.relpath(code.co_filename, settings.BASE_DIR)
+            location = f"{path}:{frame.f_lineno}"
+        frame = frame.f_back
+    return ", ".join(part for part in (field, location) if part)
+
+
+class NPlusOneDetector:
+    """Находит запросы, повторённые за один HTTP-запрос больше N раз."""
+
+    def __init__(self, request):
+        self.request = request
+        self.threshold = settings.NPLUSONE_THRESHOLD
+        self.counts = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        statement = normalize_sql(sql)
+        self.counts[statement] += 1
+        if self.counts[statement] == self.threshold + 1:
+            self.origins[statement] = find_origin()
+        return execute(sql, params, many, context)
+
+    def finish(self, response):
+        problems = [
+            f"запрос выполнен {self.counts[statement]} раз "
+            f"({origin or 'источник не найден'}): {statement}"
+            for statement, origin in self.origins.items()
+        ]
+        if not problems:
+            return
+        message = "N+1 в {} {}: {}".format(
+            self.request.method, self.request.path, "; ".join(problems)
+        )
+        if settings.NPLUSONE_RAISE:
+            raise NPlusOneError(message)
+        logger.warning(message)
+
+
+class SlowQueryLog:
+    """Пишет в лог запросы дольше SLOW_QUERY_MS миллисекунд."""
+
+    def __init__(self, request):
+        self.request = request
+        self.limit = settings.SLOW_QUERY_MS / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration > self.limit:
+                logger.warning(
+                    "Медленный запрос в %s %s: %.1f мс (%s): %s",
+                    self.request.method,
+                    self.request.path,
+                    duration * 1000,
+                    find_origin() or "источник не найден",
+                    sql,
+                )
+
+    def finish(self, response):
+        pass
@@ -1,11 +1,211 @@
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.db import router, transaction
 from django.utils.timezone import now
 from rest_framework import relations, serializers
+from rest_framework.settings import api_settings
+from rest_framework.utils import html
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.datasets import (
+    bulk_insert,
+    insert_titles,
+    resolve_title_relations,
+)
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    Review,
+    Title,
+    User,
+)
+from reviews.search import get_search_backend
 
+from .cache import touch
+from .metrics import TimedRepresentationMixin
 
-class ListUsersSerializer(serializers.ModelSerializer):
+
+class TimedModelSerializer(
+    TimedRepresentationMixin, serializers.ModelSerializer
+):
+    pass
+
+
+class SparseFieldsMixin:
+    """Оставляет поля context["fields"] и раскрывает context["expand"].
+
+    Meta.expandable_fields сопоставляет имени связи класс вложенного
+    сериализатора и его аргументы.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get("fields")
+        expand = self.context.get("expand", ())
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        for name in expand:
+            serializer_class, kwargs = expandable[name]
+            fields[name] = serializer_class(read_only=True, **kwargs)
+        if requested is not None:
+            fields = {
+                name: field
+                for name, field in fields.items()
+                if name in requested or name in expand
+            }
+        return fields
+
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """Проверяет и сохраняет список объектов пакетно.
+
+    Проверки, которым нужна база, выполняются в get_item_errors сразу
+    для всех элементов, прошедших проверку полей, а сохранение идёт
+    одним bulk_create.
+    """
+
+    def to_internal_value(self, data):
+        limit = settings.BULK_CREATE_MAX_ITEMS
+        if isinstance(data, list) and len(data) > limit:
+            raise serializers.ValidationError(
+                {
+                    api_settings.NON_FIELD_ERRORS_KEY: [
+                        f"Не больше {limit} объектов за один запрос."
+                    ]
+                }
+            )
+        if html.is_html_input(data):
+            data = html.parse_html_list(data, default=[])
+        if not isinstance(data, list) or not data:
+            return super().to_internal_value(data)
+        items, errors = [], []
+        for item in data:
+            try:
+                items.append(self.child.run_validation(item))
+            except serializers.ValidationError as exc:
+                errors.append(exc.detail)
+            else:
+                errors.append(None)
+        # ошибки полей и проверки по базе сводятся в один список по индексу
+        item_errors = iter(self.get_item_errors(items))
+        errors = [
+            next(item_errors) if error is None else error for error in errors
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def get_item_errors(self, items):
+        return [{} for item in items]
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        objs = [model(**item) for item in validated_data]
+        using = router.db_for_write(model)
+        with transaction.atomic(using=using):
+            bulk_insert(model, objs, using)
+            self.after_bulk_create(objs, using)
+        return objs
+
+    def after_bulk_create(self, objs, using):
+        pass
+
+
+class ReviewListSerializer(BulkCreateListSerializer):
+    def get_title_id(self, item):
+        if "title_id" in item:
+            return item["title_id"]
+        return self.context["view"].get_parent().pk
+
+    def get_item_errors(self, items):
+        title_ids = [self.get_title_id(item) for item in items]
+        existing = set(
+            Title.objects.filter(pk__in=title_ids).values_list(
+                "pk", flat=True
+            )
+        )
+        reviewed = set(
+            Review.objects.filter(
+                author_id=self.context["request"].user.id,
+                title_id__in=existing,
+            ).values_list("title_id", flat=True)
+        )
+        errors = []
+        for title_id in title_ids:
+            if title_id not in existing:
+                errors.append({"title": ["Произведение не найдено."]})
+            elif title_id in reviewed:
+                errors.append(
+                    {
+                        api_settings.NON_FIELD_ERRORS_KEY: [
+                            "Вы уже оставляли отзыв к этому произведению."
+                        ]
+                    }
+                )
+            else:
+                errors.append({})
+            reviewed.add(title_id)
+        return errors
+
+    def after_bulk_create(self, objs, using):
+        title_ids = {review.title_id for review in objs}
+        Title.objects.using(using).filter(pk__in=title_ids).refresh_rating()
+        get_search_backend().index_reviews(
+            [review.pk for review in objs], using
+        )
+        # рейтинг обновлён запросом UPDATE, сигналов модели не было
+        touch(Title, using=using)
+
+
+class CommentListSerializer(BulkCreateListSerializer):
+    def get_item_errors(self, items):
+        review_ids = [
+            item["review_id"] for item in items if "review_id" in item
+        ]
+        existing = set(
+            Review.objects.filter(pk__in=review_ids).values_list(
+                "pk", flat=True
+            )
+        )
+        return [
+            {"review": ["Отзыв не найден."]}
+            if "review_id" in item and item["review_id"] not in existing
+            else {}
+            for item in items
+        ]
+
+
+class TitleListSerializer(BulkCreateListSerializer):
+    """Находит жанры и категории всего списка двумя запросами."""
+
+    def get_item_errors(self, items):
+        # дальше в validated_data — объекты вместо слагов
+        return resolve_title_relations(items)
+
+    def create(self, validated_data):
+        return insert_titles(validated_data, router.db_for_write(Title))
+
+
+class SlugsRelatedField(serializers.ManyRelatedField):
+    """Список слагов, который находит все объекты одним запросом."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+        slug_field = self.child_relation.slug_field
+        slugs = [str(slug) for slug in data]
+        objects = self.child_relation.get_queryset().in_bulk(
+            slugs, field_name=slug_field
+        )
+        for slug in slugs:
+            if slug not in objects:
+                self.child_relation.fail(
+                    "does_not_exist", slug_name=slug_field, value=slug
+                )
+        return [objects[slug] for slug in dict.fromkeys(slugs)]
+
+
+class ListUsersSerializer(TimedModelSerializer):
     class Meta:
         model = User
         fields = (
@@ -18,7 +218,7 @@ class ListUsersSerializer(serializers.ModelSerializer):
         )
 
 
-class TokenObtainSerializer(serializers.ModelSerializer):
+class TokenObtainSerializer(TimedModelSerializer):
     username = serializers.CharField(required=True)
     confirmation_code = serializers.CharField(source="token", required=True)
 
@@ -27,7 +227,7 @@ class TokenObtainSerializer(serializers.ModelSerializer):
         fields = ("username", "confirmation_code")
 
 
-class NewUserSerializer(serializers.ModelSerializer):
+class NewUserSerializer(TimedModelSerializer):
     class Meta:
         model = User
         fields = ("username", "email")
@@ -38,19 +238,25 @@ class NewUserSerializer(serializers.ModelSerializer):
         return data
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedModelSerializer):
     class Meta:
         model = Genre
         exclude = ["id"]
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedModelSerializer):
     class Meta:
         model = Category
         exclude = ["id"]
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class AuthorSerializer(TimedModelSerializer):
+    class Meta:
+        model = User
+        fields = ("username", "first_name", "last_name", "bio")
+
+
+class TitleSerializer(SparseFieldsMixin, TimedModelSerializer):
     genre = GenreSerializer(required=True, many=True)
     category = CategorySerializer(required=True)
     rating = serializers.IntegerField()
@@ -68,9 +274,51 @@ class TitleSerializer(serializers.ModelSerializer):
         )
 
 
-class TitlePostSerializer(serializers.ModelSerializer):
-    genre = serializers.SlugRelatedField(
-        slug_field="slug", many=True, queryset=Genre.objects.all()
+class LeaderboardSerializer(TitleSerializer):
+    reviews_count = serializers.IntegerField(read_only=True)
+    weighted_rating = serializers.FloatField(read_only=True)
+
+    class Meta(TitleSerializer.Meta):
+        fields = TitleSerializer.Meta.fields + (
+            "reviews_count",
+            "weighted_rating",
+        )
+
+
+class LeaderboardQuerySerializer(serializers.Serializer):
+    """Параметры `/api/v1/titles/top/`: одна область и порядок."""
+
+    ORDERINGS = {
+        "rating": ("-weighted_rating", "-title_id"),
+        "reviews": ("-reviews_count", "-title_id"),
+    }
+
+    genre = serializers.SlugField(required=False)
+    category = serializers.SlugField(required=False)
+    year = serializers.IntegerField(required=False)
+    order = serializers.ChoiceField(
+        choices=list(ORDERINGS), default="rating"
+    )
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.LEADERBOARD_MAX_SIZE,
+        default=settings.LEADERBOARD_SIZE,
+    )
+
+    def validate(self, data):
+        scopes = ("genre", "category", "year")
+        if sum(name in data for name in scopes) > 1:
+            raise serializers.ValidationError(
+                "Укажите только один из параметров genre, category, year."
+            )
+        return data
+
+
+class TitlePostSerializer(TimedModelSerializer):
+    genre = SlugsRelatedField(
+        child_relation=serializers.SlugRelatedField(
+            slug_field="slug", queryset=Genre.objects.all()
+        )
     )
     category = serializers.SlugRelatedField(
         slug_field="slug", many=False, queryset=Category.objects.all()
@@ -95,7 +343,18 @@ class TitlePostSerializer(serializers.ModelSerializer):
         return value
 
 
-class UserDetailSerializer(serializers.ModelSerializer):
+class BulkTitleSerializer(TitlePostSerializer):
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
+    class Meta(TitlePostSerializer.Meta):
+        list_serializer_class = TitleListSerializer
+
+    def to_representation(self, instance):
+        return TitlePostSerializer(instance, context=self.context).data
+
+
+class UserDetailSerializer(TimedModelSerializer):
     class Meta:
         model = User
         fields = (
@@ -109,12 +368,14 @@ class UserDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ("role",)
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, TimedModelSerializer):
     author = relations.SlugRelatedField(slug_field="username", read_only=True)
 
     class Meta:
         model = Review
         fields = ("id", "text", "author", "score", "pub_date")
+        list_serializer_class = ReviewListSerializer
+        expandable_fields = {"author": (AuthorSerializer, {})}
 
     def validate_score(self, value):
         if not (1 <= value <= 10):
@@ -124,24 +385,35 @@ class ReviewSerializer(serializers.ModelSerializer):
         return value
 
     def validate(self, data):
+        if self.instance is not None or self.parent is not None:
+            # при пакетном создании проверяет ReviewListSerializer
+            return data
         user = self.context["request"].user
-        title_id = self.context["view"].kwargs["title_id"]
-        if (
-            Review.objects.filter(
-                title=get_object_or_404(Title, pk=title_id), author=user
-            ).exists()
-            and self.instance is None
-        ):
+        title = self.context["view"].get_parent()
+        if Review.objects.filter(title=title, author_id=user.id).exists():
             raise serializers.ValidationError(
                 "Вы уже оставляли отзыв к этому произведению."
             )
         return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, TimedModelSerializer):
     review = relations.PrimaryKeyRelatedField(read_only=True)
     author = relations.SlugRelatedField(slug_field="username", read_only=True)
 
     class Meta:
         model = Comment
         fields = ("id", "text", "review", "author", "pub_date")
+        list_serializer_class = CommentListSerializer
+        expandable_fields = {"author": (AuthorSerializer, {})}
+
+
+class BulkReviewSerializer(ReviewSerializer):
+    title = serializers.IntegerField(source="title_id")
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ("title",)
+
+
+class BulkCommentSerializer(CommentSerializer):
+    review = serializers.IntegerField(source="review_id")
@@ -0,0 +1,104 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.signals import bulk_created
+
+from .authentication import USER_CLAIMS, revoke_tokens
+from .cache import touch
+from .serializers import AuthorSerializer
+
+CACHED_MODELS = (Category, Comment, Genre, Review, Title, User)
+CLAIM_FIELDS = USER_CLAIMS + ("is_active",)
+AUTHOR_FIELDS = AuthorSerializer.Meta.fields
+
+
+@receiver(pre_save, sender=User)
+def compare_stored_user(sender, instance, raw, using, **kwargs):
+    """Отзывает токены при смене утверждений и помечает смену профиля."""
+    instance._author_changed = False
+    if raw or instance.pk is None:
+        return
+    stored = (
+        User.objects.using(using)
+        .filter(pk=instance.pk)
+        .values(*{*CLAIM_FIELDS, *AUTHOR_FIELDS})
+        .first()
+    )
+    if stored is None:
+        return
+    if any(stored[name] != getattr(instance, name) for name in CLAIM_FIELDS):
+        revoke_tokens(instance.pk)
+    instance._author_changed = any(
+        stored[name] != getattr(instance, name) for name in AUTHOR_FIELDS
+    )
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    revoke_tokens(instance.pk)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(bulk_created)
+def touch_cached_model(sender, using, **kwargs):
+    if sender in CACHED_MODELS:
+        touch(sender, using=using)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_title_genres(sender, using, **kwargs):
+    touch(Title, using=using)
+
+
+# Ниже сдвигается поле modified объектов, в представление которых входят
+# изменённые данные: по нему вычисляются ETag и Last-Modified.
+
+
+@receiver(post_save, sender=User)
+def modify_authored_on_profile_change(sender, instance, using, **kwargs):
+    if not getattr(instance, "_author_changed", False):
+        return
+    modified = now()
+    for model in (Review, Comment):
+        model.objects.using(using).filter(author=instance).update(
+            modified=modified
+        )
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def modify_category_titles(sender, instance, using, raw=False,
+                           created=False, **kwargs):
+    if not (raw or created):
+        Title.objects.using(using).filter(category=instance).touch()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def modify_genre_titles(sender, instance, using, raw=False, created=False,
+                        **kwargs):
+    if not (raw or created):
+        Title.objects.using(using).filter(genre=instance).touch()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def modify_titles_on_genres_change(sender, instance, action, reverse,
+                                   pk_set, using, **kwargs):
+    titles = Title.objects.using(using)
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            titles.filter(pk=instance.pk).touch()
+    elif action in ("post_add", "post_remove") and pk_set:
+        titles.filter(pk__in=pk_set).touch()
+    elif action == "pre_clear":
+        # после очистки связей произведения жанра уже не найти
+        titles.filter(genre=instance).touch()
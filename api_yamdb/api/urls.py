@@ -2,8 +2,11 @@ from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
 from .views import (
+    BulkCommentViewSet,
+    BulkReviewViewSet,
     CategoryViewSet,
     CommentViewSet,
+    ExportView,
     GenreViewSet,
     NewUserViewSet,
     ReviewViewSet,
@@ -11,6 +14,7 @@ from .views import (
     NewUserViewSet,
     TokenObtainView,
     ListUsersViewSet,
+    MetricsView,
 )
 
 app_name = "api"
@@ -29,6 +33,8 @@ router.register(
     basename="comments",
 )
 router.register("auth/signup", NewUserViewSet)
+router.register("reviews", BulkReviewViewSet, basename="bulk-reviews")
+router.register("comments", BulkCommentViewSet, basename="bulk-comments")
 
 urlpatterns = [
     path(
@@ -36,5 +42,11 @@ urlpatterns = [
         TokenObtainView.as_view(),
         name="token_obtain_pair",
     ),
+    path(
+        "v1/export/<slug:name>.<slug:extension>",
+        ExportView.as_view(),
+        name="export",
+    ),
+    path("v1/_metrics", MetricsView.as_view(), name="metrics"),
     path("v1/", include(router.urls)),
 ]
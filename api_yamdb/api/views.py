@@ -1,6 +1,7 @@
-from django.db.models import Avg
 from django.conf import settings
-from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import Count
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, views, viewsets
@@ -11,11 +12,32 @@ from rest_framework.permissions import (
     IsAuthenticated,
 )
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.datasets import EXPORT_DATASETS, EXPORT_FORMATS
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    OutgoingMail,
+    Review,
+    Title,
+    TitleRanking,
+    User,
+)
 
-from .filters import TitleFilter
-from .mixins import CreateListDestroyModelMixin
+from . import metrics
+from .authentication import UserClaimsRefreshToken
+from .cache import CachedResponseMixin, ConditionalGetMixin
+from .filters import TieBreakOrderingFilter, TitleFilter
+from .mixins import (
+    AuthoredBulkCreateMixin,
+    AuthoredSparseFieldsetMixin,
+    BulkCreateMixin,
+    CreateListDestroyModelMixin,
+    CursorPaginationMixin,
+    NestedParentMixin,
+    SparseFieldsetMixin,
+)
+from .pagination import PubDateCursorPagination, TitleCursorPagination
 from .permissions import (
     AdminModeratorOrReadOnly,
     AdminOnly,
@@ -23,9 +45,14 @@ from .permissions import (
     UserPermissions,
 )
 from .serializers import (
+    BulkCommentSerializer,
+    BulkReviewSerializer,
+    BulkTitleSerializer,
     CategorySerializer,
     CommentSerializer,
     GenreSerializer,
+    LeaderboardQuerySerializer,
+    LeaderboardSerializer,
     ListUsersSerializer,
     TokenObtainSerializer,
     NewUserSerializer,
@@ -51,7 +78,7 @@ class TokenObtainView(views.APIView):
             return Response(status=status.HTTP_404_NOT_FOUND)
 
         if serializer.validated_data["token"] == user.token:
-            refresh = RefreshToken.for_user(user)
+            refresh = UserClaimsRefreshToken.for_user(user)
             result = {
                 "token": str(refresh.access_token),
             }
@@ -61,6 +88,32 @@ class TokenObtainView(views.APIView):
         )
 
 
+class ExportView(views.APIView):
+    permission_classes = [IsAuthenticated, AdminOnly]
+
+    def get(self, request, name, extension):
+        if name not in EXPORT_DATASETS or extension not in EXPORT_FORMATS:
+            raise Http404
+        response = StreamingHttpResponse(
+            EXPORT_DATASETS[name].export(extension),
+            content_type=EXPORT_FORMATS[extension],
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="{name}.{extension}"'
+        return response
+
+
+class MetricsView(views.APIView):
+    permission_classes = [IsAuthenticated, AdminOnly]
+
+    def get(self, request):
+        return HttpResponse(
+            metrics.render_prometheus(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
 class NewUserViewSet(CreateModelMixin, viewsets.GenericViewSet):
     queryset = User.objects.all()
     serializer_class = NewUserSerializer
@@ -69,20 +122,16 @@ class NewUserViewSet(CreateModelMixin, viewsets.GenericViewSet):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
+        with transaction.atomic():
+            self.perform_create(serializer)
+            OutgoingMail.objects.create(
+                subject="Confirmation code here",
+                body="Here is the confirmation code: "
+                + serializer.instance.token,
+                from_email=settings.EMAIL_ADDRESS,
+                recipient=serializer.instance.email,
+            )
         headers = self.get_success_headers(serializer.data)
-        send_mail(
-            "Confirmation code here",
-            "Here is the confirmation code: "
-            + str(
-                get_object_or_404(
-                    User, username=serializer.validated_data["username"]
-                ).token
-            ),
-            settings.EMAIL_ADDRESS,
-            [serializer.validated_data["email"]],
-            fail_silently=False,
-        )
         return Response(
             serializer.data, status=status.HTTP_200_OK, headers=headers
         )
@@ -104,7 +153,7 @@ class ListUsersViewSet(viewsets.ModelViewSet):
         url_name="me",
     )
     def get_me(self, request):
-        queryset = get_object_or_404(User, username=self.request.user)
+        queryset = get_object_or_404(User, pk=self.request.user.pk)
         serializer = ListUsersSerializer(queryset)
         return Response(data=serializer.data)
 
@@ -116,7 +165,7 @@ class ListUsersViewSet(viewsets.ModelViewSet):
         url_name="me_patch",
     )
     def patch(self, request):
-        queryset = get_object_or_404(User, username=self.request.user)
+        queryset = get_object_or_404(User, pk=self.request.user.pk)
         serializer = UserDetailSerializer(
             queryset, data=request.data, partial=True
         )
@@ -125,10 +174,15 @@ class ListUsersViewSet(viewsets.ModelViewSet):
         return Response(data=serializer.data, status=status.HTTP_200_OK)
 
 
-class GenreViewSet(CreateListDestroyModelMixin, viewsets.GenericViewSet):
+class GenreViewSet(
+    CachedResponseMixin,
+    CreateListDestroyModelMixin,
+    viewsets.GenericViewSet,
+):
     permission_classes = [
         AdminOrReadOnly,
     ]
+    cache_models = (Genre,)
     queryset = Genre.objects.all().order_by("-id")
     serializer_class = GenreSerializer
     filter_backends = (filters.SearchFilter,)
@@ -136,10 +190,15 @@ class GenreViewSet(CreateListDestroyModelMixin, viewsets.GenericViewSet):
     lookup_field = "slug"
 
 
-class CategoryViewSet(CreateListDestroyModelMixin, viewsets.GenericViewSet):
+class CategoryViewSet(
+    CachedResponseMixin,
+    CreateListDestroyModelMixin,
+    viewsets.GenericViewSet,
+):
     permission_classes = [
         AdminOrReadOnly,
     ]
+    cache_models = (Category,)
     queryset = Category.objects.all().order_by("-id")
     serializer_class = CategorySerializer
     filter_backends = (filters.SearchFilter,)
@@ -147,51 +206,235 @@ class CategoryViewSet(CreateListDestroyModelMixin, viewsets.GenericViewSet):
     lookup_field = "slug"
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    CursorPaginationMixin,
+    SparseFieldsetMixin,
+    BulkCreateMixin,
+    viewsets.ModelViewSet,
+):
     permission_classes = [
         AdminOrReadOnly,
     ]
-    queryset = Title.objects.annotate(rating=Avg("reviews__score")).order_by(
-        "-id"
+    cache_models = (Title, Genre, Category, Review)
+    cursor_pagination_class = TitleCursorPagination
+    queryset = (
+        Title.objects.select_related("category")
+        .prefetch_related("genre")
+        .order_by("-id")
     )
     serializer_class = TitleSerializer
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, TieBreakOrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = ("rating", "year", "name", "reviews_count")
+    ordering = ("-id",)
+    sparse_actions = ("list", "retrieve", "top")
+    facet_fields = {
+        "genre": "genre__slug",
+        "category": "category__slug",
+        "year": "year",
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.get_sparse_fieldset()[0] is None:
+            return queryset
+        if not self.is_field_requested("category"):
+            queryset = queryset.select_related(None)
+        if not self.is_field_requested("genre"):
+            queryset = queryset.prefetch_related(None)
+        columns = (
+            "name",
+            "year",
+            "rating",
+            "description",
+            "category",
+            "reviews_count",
+        )
+        # пустой only() загрузил бы все столбцы; без modified save()
+        # отложенного объекта не сдвинул бы дату изменения
+        return queryset.only(
+            "id",
+            "modified",
+            *(name for name in columns if self.is_field_requested(name)),
+        )
+
+    def get_requested_facets(self):
+        value = self.request.query_params.get("facets", "")
+        if value.lower() in ("1", "true", "all"):
+            return list(self.facet_fields)
+        return [name for name in value.split(",") if name in self.facet_fields]
+
+    def get_facets(self, queryset, names):
+        title_ids = queryset.order_by().values("pk")
+        facets = {}
+        for name in names:
+            if name == "genre":
+                rows = Title.genre.through.objects.filter(
+                    title_id__in=title_ids
+                )
+            else:
+                rows = Title.objects.filter(pk__in=title_ids)
+            facets[name] = [
+                {"value": value, "count": count}
+                for value, count in rows.values_list(self.facet_fields[name])
+                .annotate(count=Count("pk"))
+                .order_by("-count", self.facet_fields[name])
+            ]
+        return facets
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        names = self.get_requested_facets()
+        if names:
+            response.data["facets"] = self.get_facets(
+                self.filter_queryset(self.get_queryset()), names
+            )
+        return response
+
+    def get_leaderboard_scope(self, params):
+        for name, scope, model in (
+            ("genre", TitleRanking.GENRE, Genre),
+            ("category", TitleRanking.CATEGORY, Category),
+        ):
+            if name in params:
+                scope_object = get_object_or_404(model, slug=params[name])
+                return {"scope": scope, "scope_key": scope_object.pk}
+        if "year" in params:
+            return {"scope": TitleRanking.YEAR, "scope_key": params["year"]}
+        return {"scope": TitleRanking.ALL, "scope_key": 0}
+
+    @action(detail=False, url_path="top", url_name="top")
+    def top(self, request):
+        """Лучшие произведения по взвешенному рейтингу.
+
+        Страница читается из таблицы лидеров по индексу, поэтому
+        стоимость запроса зависит только от limit.
+        """
+        query = LeaderboardQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        rankings = list(
+            TitleRanking.objects.filter(**self.get_leaderboard_scope(params))
+            .order_by(*query.ORDERINGS[params["order"]])
+            .values_list("title_id", "weighted_rating")[: params["limit"]]
+        )
+        titles = self.get_queryset().in_bulk(
+            [title_id for title_id, _ in rankings]
+        )
+        leaders = []
+        for title_id, weighted in rankings:
+            title = titles.get(title_id)
+            if title is not None:
+                title.weighted_rating = weighted
+                leaders.append(title)
+        serializer = self.get_serializer(leaders, many=True)
+        return Response(serializer.data)
 
     def get_serializer_class(self):
         if self.action in ["list", "retrieve"]:
             return TitleSerializer
+        if self.action == "top":
+            return LeaderboardSerializer
+        if self.action == "bulk":
+            return BulkTitleSerializer
         return TitlePostSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    CursorPaginationMixin,
+    AuthoredSparseFieldsetMixin,
+    NestedParentMixin,
+    AuthoredBulkCreateMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = ReviewSerializer
     permission_classes = [
         AdminModeratorOrReadOnly,
     ]
+    cache_models = (Review, Title, User)
+    cursor_pagination_class = PubDateCursorPagination
+    parent_model = Title
+    parent_lookup = {"pk": "title_id"}
 
     def get_queryset(self):
-        title_id = self.kwargs.get("title_id")
-        title = get_object_or_404(Title, pk=title_id)
-        return title.reviews.all().order_by("-pub_date")
+        queryset = Review.objects.filter(
+            title_id=self.kwargs["title_id"]
+        ).order_by("-pub_date")
+        # pub_date нужен курсорной пагинации, modified - сохранению
+        columns = ["pub_date", "modified", "title"] + [
+            name for name in ("text", "score") if self.is_field_requested(name)
+        ]
+        return self.with_author(queryset, columns)
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get("title_id")
-        serializer.save(author=self.request.user, title_id=title_id)
+        serializer.save(
+            author_id=self.request.user.id, title=self.get_parent()
+        )
 
+    def get_bulk_save_kwargs(self):
+        return {
+            "title_id": self.get_parent().pk,
+            **super().get_bulk_save_kwargs(),
+        }
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    CursorPaginationMixin,
+    AuthoredSparseFieldsetMixin,
+    NestedParentMixin,
+    AuthoredBulkCreateMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = CommentSerializer
     permission_classes = [
         AdminModeratorOrReadOnly,
     ]
+    cache_models = (Comment, Review, User)
+    cursor_pagination_class = PubDateCursorPagination
+    parent_model = Review
+    parent_lookup = {"pk": "review_id", "title_id": "title_id"}
 
     def get_queryset(self):
-        review_id = self.kwargs.get("review_id")
-        review = get_object_or_404(Review, pk=review_id)
-        return review.comments.all().order_by("-pub_date")
+        queryset = Comment.objects.filter(
+            review_id=self.kwargs["review_id"],
+            review__title_id=self.kwargs["title_id"],
+        ).order_by("-pub_date")
+        columns = ["pub_date", "modified"] + [
+            name
+            for name in ("text", "review")
+            if self.is_field_requested(name)
+        ]
+        return self.with_author(queryset, columns)
 
     def perform_create(self, serializer):
-        review_id = self.kwargs.get("review_id")
-        get_object_or_404(Review, pk=review_id)
-        serializer.save(author=self.request.user, review_id=review_id)
+        serializer.save(
+            author_id=self.request.user.id, review=self.get_parent()
+        )
+
+    def get_bulk_save_kwargs(self):
+        return {
+            "review_id": self.get_parent().pk,
+            **super().get_bulk_save_kwargs(),
+        }
+
+
+class BulkReviewViewSet(AuthoredBulkCreateMixin, viewsets.GenericViewSet):
+    """Отзывы к разным произведениям одним запросом."""
+
+    permission_classes = [IsAuthenticated]
+    queryset = Review.objects.all()
+    serializer_class = BulkReviewSerializer
+
+
+class BulkCommentViewSet(AuthoredBulkCreateMixin, viewsets.GenericViewSet):
+    """Комментарии к разным отзывам одним запросом."""
+
+    permission_classes = [IsAuthenticated]
+    queryset = Comment.objects.all()
+    serializer_class = BulkCommentSerializer
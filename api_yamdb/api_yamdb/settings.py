@@ -26,6 +26,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.RequestMetricsMiddleware",
+    "api.middleware.QueryInspectionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -33,6 +35,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.middleware.ReadReplicaMiddleware",
 ]
 
 ROOT_URLCONF = "api_yamdb.urls"
@@ -57,13 +60,127 @@ TEMPLATES = [
 WSGI_APPLICATION = "api_yamdb.wsgi.application"
 
 
-DATABASES = {
+DB_ENGINE = os.environ.get("DB_ENGINE", "django.db.backends.sqlite3")
+
+if DB_ENGINE == "django.db.backends.sqlite3":
+    DATABASES = {
+        "default": {
+            "ENGINE": DB_ENGINE,
+            "NAME": os.environ.get(
+                "DB_NAME", os.path.join(BASE_DIR, "db.sqlite3")
+            ),
+            "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": DB_ENGINE,
+            "NAME": os.environ.get("DB_NAME", "api_yamdb"),
+            "USER": os.environ.get("POSTGRES_USER", "postgres"),
+            "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+            "HOST": os.environ.get("DB_HOST", "localhost"),
+            "PORT": os.environ.get("DB_PORT", "5432"),
+            "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        }
+    }
+
+# Реплика для чтения: отдельный файл SQLite или хост PostgreSQL.
+READ_REPLICA_ALIAS = "replica"
+REPLICA_PIN_SECONDS = 5
+if os.environ.get("DB_REPLICA_NAME") or os.environ.get("DB_REPLICA_HOST"):
+    DATABASES[READ_REPLICA_ALIAS] = {
+        **DATABASES["default"],
+        "NAME": os.environ.get(
+            "DB_REPLICA_NAME", DATABASES["default"]["NAME"]
+        ),
+        "TEST": {"MIRROR": "default"},
+    }
+    if "HOST" in DATABASES["default"]:
+        DATABASES[READ_REPLICA_ALIAS]["HOST"] = os.environ.get(
+            "DB_REPLICA_HOST", DATABASES["default"]["HOST"]
+        )
+
+DATABASE_ROUTERS = ["api.db_routers.ReplicaRouter"]
+
+# Применяются к каждому новому соединению с SQLite.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -20000,
+    "temp_store": "MEMORY",
+    "mmap_size": 134217728,
+}
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "api_yamdb",
+    }
+}
+if os.environ.get("CACHE_LOCATION"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ["CACHE_LOCATION"],
     }
+
+# Состояние, которое должны видеть все процессы и серверы: отметки
+# изменения моделей, отзыв токенов, закрепление чтения за основной
+# базой. По умолчанию — таблица в основной базе (`manage.py
+# createcachetable`), SHARED_CACHE_BACKEND позволяет взять, например,
+# memcached.
+CACHES["shared"] = {
+    "BACKEND": os.environ.get(
+        "SHARED_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"
+    ),
+    "LOCATION": os.environ.get("SHARED_CACHE_LOCATION", "api_shared_cache"),
+    "OPTIONS": {"MAX_ENTRIES": 100000},
+}
+# Копии значений из общего кэша в памяти процесса, которые можно читать
+# с небольшим опозданием: так проверка отзыва токена не ходит в общий
+# кэш на каждом запросе.
+CACHES["local"] = {
+    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    "LOCATION": "api_yamdb_local",
 }
 
+# Замеры запросов: заголовок Server-Timing и /api/v1/_metrics.
+REQUEST_METRICS_ENABLED = True
+REQUEST_METRICS_WINDOW = 1024
+
+# Проверка запросов к БД: N+1 и медленные запросы. В тестах включается
+# фикстурой, NPLUSONE_RAISE превращает находку в ошибку.
+QUERY_INSPECTION_ENABLED = DEBUG
+QUERY_INSPECTORS = [
+    "api.querylog.NPlusOneDetector",
+    "api.querylog.SlowQueryLog",
+]
+NPLUSONE_THRESHOLD = 5
+NPLUSONE_RAISE = os.environ.get("NPLUSONE_RAISE", "") == "1"
+SLOW_QUERY_MS = 100
+
+# Наибольшая длина списка в `POST .../bulk/`.
+BULK_CREATE_MAX_ITEMS = 500
+
+API_CACHE_ENABLED = True
+API_CACHE_TIMEOUT = 60
+
+# По умолчанию движок поиска выбирается по СУБД: FTS5 для SQLite,
+# tsvector для PostgreSQL. "reviews.search.LikeSearchBackend" подходит
+# для сборок SQLite без FTS5.
+SEARCH_BACKEND = None
+SEARCH_CONFIG = "russian"
+
+# Таблицы лидеров `/api/v1/titles/top/`: рейтинг стягивается к
+# LEADERBOARD_PRIOR_MEAN, как если бы у каждого произведения было ещё
+# LEADERBOARD_PRIOR_WEIGHT отзывов с такой оценкой. Среднюю оценку по
+# базе печатает `manage.py refresh_leaderboard`.
+LEADERBOARD_PRIOR_WEIGHT = 10
+LEADERBOARD_PRIOR_MEAN = 5.5
+LEADERBOARD_SIZE = 50
+LEADERBOARD_MAX_SIZE = 100
+
 AUTH_USER_MODEL = "reviews.User"
 
 
@@ -100,7 +217,7 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, "static/"),)
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.StatelessJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly"
@@ -111,8 +228,14 @@ REST_FRAMEWORK = {
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
+    "TOKEN_USER_CLASS": "api.authentication.RoleTokenUser",
 }
 
+JWT_REVOCATION_CACHE = True
+# Сколько секунд процесс помнит прочитанный из общего кэша отзыв токенов
+# пользователя. Другие процессы увидят отзыв с такой задержкой.
+JWT_REVOCATION_CHECK_SECONDS = 5
+
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 EMAIL_HOST = "localhost"
 EMAIL_PORT = 25
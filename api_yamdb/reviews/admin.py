@@ -1,6 +1,24 @@
-from django.contrib import admin
+import csv
+import io
 
-from .models import Category, Comment, Genre, Title, Review, User
+from django import forms
+from django.contrib import admin, messages
+from django.core.validators import validate_slug
+from django.db import router
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .datasets import insert_titles, resolve_title_relations
+from .models import (
+    Category,
+    Comment,
+    Genre,
+    OutgoingMail,
+    Review,
+    Title,
+    User,
+)
 
 
 @admin.register(Category)
@@ -26,12 +44,45 @@ class GenreAdmin(admin.ModelAdmin):
     list_display_links = ("name",)
 
 
+class TitleImportForm(forms.Form):
+    file = forms.FileField(
+        label="CSV-файл",
+        help_text=(
+            "Колонки: name, year, category, genre, description. "
+            "Слаги жанров перечисляются через запятую."
+        ),
+    )
+
+
+class TitleRowForm(forms.ModelForm):
+    """Строка CSV-файла: поля произведения и слаги связей."""
+
+    category = forms.SlugField()
+    genre = forms.CharField(required=False)
+
+    class Meta:
+        model = Title
+        fields = ("name", "year", "description")
+
+    def clean_genre(self):
+        slugs = [
+            slug.strip()
+            for slug in self.cleaned_data["genre"].split(",")
+            if slug.strip()
+        ]
+        for slug in slugs:
+            validate_slug(slug)
+        return slugs
+
+
 @admin.register(Title)
 class TitleAdmin(admin.ModelAdmin):
+    change_list_template = "admin/reviews/title/change_list.html"
     list_display = (
         "name",
         "year",
         "category",
+        "rating",
     )
     list_filter = (
         "category",
@@ -39,6 +90,65 @@ class TitleAdmin(admin.ModelAdmin):
     )
     search_fields = ("category__name",)
 
+    def get_urls(self):
+        return [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="reviews_title_import",
+            ),
+        ] + super().get_urls()
+
+    def validate_rows(self, file):
+        """Проверяет строки файла; возвращает данные и ошибки по строкам."""
+        reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig"))
+        items, errors = [], []
+        for row in reader:
+            form = TitleRowForm(row)
+            if form.is_valid():
+                items.append(form.cleaned_data)
+                errors.append(None)
+            else:
+                errors.append(form.errors)
+        item_errors = iter(resolve_title_relations(items))
+        errors = [
+            next(item_errors) if error is None else error for error in errors
+        ]
+        return items, errors
+
+    def import_view(self, request):
+        """Пакетно создаёт произведения из CSV-файла."""
+        if not self.has_add_permission(request):
+            return redirect("admin:reviews_title_changelist")
+        form = TitleImportForm(request.POST or None, request.FILES or None)
+        row_errors = []
+        if request.method == "POST" and form.is_valid():
+            items, errors = self.validate_rows(form.cleaned_data["file"])
+            if not any(errors):
+                titles = insert_titles(items, router.db_for_write(Title))
+                self.message_user(
+                    request,
+                    f"Добавлено произведений: {len(titles)}.",
+                    messages.SUCCESS,
+                )
+                return redirect("admin:reviews_title_changelist")
+            row_errors = [
+                (number, error)
+                for number, error in enumerate(errors, 2)
+                if error
+            ]
+        return TemplateResponse(
+            request,
+            "admin/reviews/title/import.html",
+            {
+                **self.admin_site.each_context(request),
+                "opts": self.model._meta,
+                "title": "Импорт произведений",
+                "form": form,
+                "row_errors": row_errors,
+            },
+        )
+
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
@@ -60,5 +170,18 @@ class UserAdmin(admin.ModelAdmin):
     list_editable = ("role",)
 
 
+@admin.register(OutgoingMail)
+class OutgoingMailAdmin(admin.ModelAdmin):
+    list_display = (
+        "recipient",
+        "subject",
+        "created",
+        "attempts",
+        "sent_at",
+    )
+    list_filter = ("sent_at",)
+    search_fields = ("recipient",)
+
+
 admin.site.site_title = "YAMBD project"
 admin.site.site_header = "YAMBD project"
@@ -0,0 +1,259 @@
+import csv
+import json
+import os
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.db.models import prefetch_related_objects
+
+from .models import (
+    Category,
+    Comment,
+    Genre,
+    Review,
+    Title,
+    TitleRanking,
+    User,
+)
+from .search import get_search_backend
+from .signals import bulk_created
+
+DATA_DIR = os.path.join(settings.BASE_DIR, "static", "data")
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def reset_sequences(models):
+    """Сдвигает последовательности id после вставки строк с явным id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+def bulk_insert(model, objs, using=DEFAULT_DB_ALIAS):
+    """bulk_create, после которого у объектов заполнен id.
+
+    Вызывается внутри транзакции. Сигналы сохранения bulk_create не
+    отправляет, поэтому подписчики получают bulk_created.
+    """
+    model.objects.using(using).bulk_create(objs)
+    if objs and objs[0].pk is None:
+        # SQLite не возвращает id из bulk_create. Транзакция держит
+        # блокировку записи, поэтому новые строки — последние по id.
+        pks = model.objects.using(using).order_by("-pk")
+        pks = pks.values_list("pk", flat=True)[: len(objs)]
+        for obj, pk in zip(objs, reversed(pks)):
+            obj.pk = pk
+            obj._state.adding = False
+            obj._state.db = using
+    bulk_created.send(sender=model, objs=objs, using=using)
+    return objs
+
+
+def resolve_title_relations(items):
+    """Находит жанры и категории списка произведений двумя запросами.
+
+    В items слаг категории и список слагов жанров. Возвращает ошибки по
+    элементам; если ошибок нет, слаги заменяются объектами.
+    """
+    genres = Genre.objects.in_bulk(
+        {slug for item in items for slug in item["genre"]},
+        field_name="slug",
+    )
+    categories = Category.objects.in_bulk(
+        {item["category"] for item in items}, field_name="slug"
+    )
+    errors = []
+    for item in items:
+        error = {}
+        missing = [slug for slug in item["genre"] if slug not in genres]
+        if missing:
+            error["genre"] = [
+                f"Жанр со slug={slug} не существует." for slug in missing
+            ]
+        if item["category"] not in categories:
+            error["category"] = [
+                f"Категория со slug={item['category']} не существует."
+            ]
+        errors.append(error)
+    if not any(errors):
+        for item in items:
+            item["category"] = categories[item["category"]]
+            item["genre"] = [
+                genres[slug] for slug in dict.fromkeys(item["genre"])
+            ]
+    return errors
+
+
+def insert_titles(items, using=DEFAULT_DB_ALIAS):
+    """Создаёт произведения из результата resolve_title_relations.
+
+    Связи с жанрами вставляются одним bulk_create, поисковый индекс и
+    таблицы лидеров обновляются для всего списка сразу.
+    """
+    titles = [
+        Title(
+            **{name: value for name, value in item.items() if name != "genre"}
+        )
+        for item in items
+    ]
+    through = Title.genre.through
+    with transaction.atomic(using=using):
+        bulk_insert(Title, titles, using)
+        through.objects.using(using).bulk_create(
+            through(title_id=title.pk, genre_id=genre.pk)
+            for title, item in zip(titles, items)
+            for genre in item["genre"]
+        )
+        prefetch_related_objects(titles, "genre")
+        title_ids = [title.pk for title in titles]
+        get_search_backend().index_titles(title_ids, using)
+        TitleRanking.objects.using(using).rebuild(title_ids)
+    return titles
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def format_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return (
+            value.astimezone(timezone.utc)
+            .isoformat(timespec="milliseconds")
+            .replace("+00:00", "Z")
+        )
+    return value
+
+
+class Dataset:
+    """Описание CSV-файла из static/data и его соответствия модели.
+
+    `export_columns` дописываются в конец строки при выгрузке и
+    игнорируются при загрузке.
+    """
+
+    def __init__(self, filename, model, columns, field_names=None,
+                 export_columns=()):
+        self.filename = filename
+        self.model = model
+        self.columns = columns
+        self.export_columns = columns + export_columns
+        field_names = field_names or {}
+        self.fields = [
+            model._meta.get_field(field_names.get(column, column))
+            for column in columns
+        ]
+        self.export_attnames = [
+            model._meta.get_field(field_names.get(column, column)).attname
+            for column in self.export_columns
+        ]
+
+    @property
+    def name(self):
+        return os.path.splitext(self.filename)[0]
+
+    def to_python(self, row):
+        values = {}
+        for column, field in zip(self.columns, self.fields):
+            value = row[column]
+            if value == "":
+                value = None if field.null else field.get_default()
+            else:
+                value = field.to_python(value)
+            values[field.attname] = value
+        return values
+
+    def to_instance(self, row):
+        instance = self.model(**self.to_python(row))
+        if isinstance(instance, User) and not instance.token:
+            instance.token = User.generate_key()
+        return instance
+
+    def export_rows(self, chunk_size):
+        rows = (
+            self.model.objects.order_by("pk")
+            .values_list(*self.export_attnames)
+            .iterator(chunk_size=chunk_size)
+        )
+        for row in rows:
+            yield [format_value(value) for value in row]
+
+    def export(self, export_format, chunk_size=2000):
+        """Построчно отдаёт выгрузку таблицы в формате csv или ndjson."""
+        if export_format == "csv":
+            writer = csv.writer(Echo())
+            yield writer.writerow(self.export_columns)
+            for row in self.export_rows(chunk_size):
+                yield writer.writerow(row)
+        else:
+            for row in self.export_rows(chunk_size):
+                yield json.dumps(
+                    dict(zip(self.export_columns, row)), ensure_ascii=False
+                ) + "\n"
+
+
+USERS = Dataset(
+    "users.csv",
+    User,
+    (
+        "id",
+        "password",
+        "last_login",
+        "is_superuser",
+        "username",
+        "first_name",
+        "last_name",
+        "is_staff",
+        "is_active",
+        "date_joined",
+        "email",
+        "bio",
+        "role",
+        "token",
+    ),
+)
+CATEGORIES = Dataset("category.csv", Category, ("id", "name", "slug"))
+GENRES = Dataset("genre.csv", Genre, ("id", "name", "slug"))
+TITLES = Dataset(
+    "titles.csv",
+    Title,
+    ("id", "name", "year", "description", "category"),
+    export_columns=("rating",),
+)
+GENRE_TITLES = Dataset(
+    "genre_title.csv",
+    Title.genre.through,
+    ("id", "title_id", "genre_id"),
+    {"title_id": "title", "genre_id": "genre"},
+)
+REVIEWS = Dataset(
+    "review.csv",
+    Review,
+    ("id", "text", "score", "pub_date", "author", "title_id"),
+    {"title_id": "title"},
+)
+COMMENTS = Dataset(
+    "comments.csv",
+    Comment,
+    ("id", "text", "pub_date", "author", "review_id"),
+    {"review_id": "review"},
+)
+
+# Порядок важен: каждый файл ссылается только на уже загруженные.
+DATASETS = (USERS, CATEGORIES, GENRES, TITLES, GENRE_TITLES, REVIEWS, COMMENTS)
+EXPORT_DATASETS = {
+    dataset.name: dataset
+    for dataset in (
+        CATEGORIES, GENRES, TITLES, GENRE_TITLES, REVIEWS, COMMENTS
+    )
+}
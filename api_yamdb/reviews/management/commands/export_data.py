@@ -0,0 +1,55 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from reviews.datasets import EXPORT_DATASETS, EXPORT_FORMATS
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает произведения, жанры, категории, отзывы и комментарии "
+        "в CSV (формат static/data) или NDJSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default="export",
+            help="Каталог, в который сохраняются файлы.",
+        )
+        parser.add_argument(
+            "--format",
+            dest="export_format",
+            choices=EXPORT_FORMATS,
+            default="csv",
+            help="Формат выгрузки.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Сколько строк читать из БД за один раз.",
+        )
+        parser.add_argument(
+            "--only",
+            nargs="+",
+            choices=EXPORT_DATASETS,
+            help="Выгрузить только указанные таблицы.",
+        )
+
+    def handle(self, *args, **options):
+        os.makedirs(options["path"], exist_ok=True)
+        names = options["only"] or EXPORT_DATASETS
+        for name in names:
+            dataset = EXPORT_DATASETS[name]
+            path = os.path.join(
+                options["path"], f"{name}.{options['export_format']}"
+            )
+            with open(path, "w", encoding="utf-8", newline="") as file:
+                file.writelines(
+                    dataset.export(
+                        options["export_format"], options["chunk_size"]
+                    )
+                )
+            self.stdout.write(f"{name}: {path}")
+        self.stdout.write(self.style.SUCCESS("Выгрузка завершена."))
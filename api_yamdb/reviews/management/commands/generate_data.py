@@ -0,0 +1,286 @@
+import csv
+import os
+import random
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from reviews.datasets import (
+    CATEGORIES,
+    COMMENTS,
+    DATASETS,
+    GENRE_TITLES,
+    GENRES,
+    REVIEWS,
+    TITLES,
+    USERS,
+    format_value,
+    reset_sequences,
+)
+from reviews.models import MODERATOR, USER, Title, TitleRanking
+from reviews.search import get_search_backend
+
+PUB_DATE_START = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+
+def zipf_weights(size, exponent):
+    return [1 / rank ** exponent for rank in range(1, size + 1)]
+
+
+def zipf_counts(total, size, exponent, cap):
+    """Делит total между size корзинами по закону Ципфа.
+
+    Ни одна корзина не получает больше cap: излишек раздаётся по
+    порядку корзинам, у которых осталось место.
+    """
+    weights = zipf_weights(size, exponent)
+    scale = total / sum(weights)
+    counts = [min(cap, int(weight * scale)) for weight in weights]
+    remaining = total - sum(counts)
+    while remaining > 0:
+        for index in range(size):
+            if counts[index] < cap:
+                counts[index] += 1
+                remaining -= 1
+                if not remaining:
+                    break
+    return counts
+
+
+class Generator:
+    """Потоково выдаёт строки файлов static/data.
+
+    id задаются явно и продолжают существующие в базе, поэтому строки
+    ссылаются друг на друга без обращения к БД. В памяти держатся
+    только массивы размером с число произведений.
+    """
+
+    def __init__(self, options, first_ids):
+        self.options = options
+        self.rng = random.Random(options["seed"])
+        self.first_ids = first_ids
+        self.now = datetime.now(timezone.utc)
+
+    def ids(self, dataset, count):
+        start = self.first_ids[dataset.name]
+        return range(start, start + count)
+
+    def random_date(self, start=PUB_DATE_START):
+        seconds = (self.now - start).total_seconds()
+        return start + timedelta(seconds=self.rng.uniform(0, seconds))
+
+    def users(self):
+        for user_id in self.ids(USERS, self.options["users"]):
+            yield (
+                user_id, "", None, False, f"user{user_id}", "", "", False,
+                True, self.now, f"user{user_id}@yamdb.fake", "",
+                MODERATOR if user_id % 100 == 0 else USER,
+                f"{self.rng.getrandbits(160):040x}",
+            )
+
+    def categories(self):
+        for category_id in self.ids(CATEGORIES, self.options["categories"]):
+            yield category_id, f"Категория {category_id}", (
+                f"category-{category_id}"
+            )
+
+    def genres(self):
+        for genre_id in self.ids(GENRES, self.options["genres"]):
+            yield genre_id, f"Жанр {genre_id}", f"genre-{genre_id}"
+
+    def titles(self):
+        categories = self.ids(CATEGORIES, self.options["categories"])
+        for title_id in self.ids(TITLES, self.options["titles"]):
+            yield (
+                title_id,
+                f"Произведение {title_id}",
+                self.rng.randint(1900, self.now.year),
+                f"Описание произведения {title_id}",
+                self.rng.choice(categories),
+            )
+
+    def genre_titles(self):
+        genres = self.ids(GENRES, self.options["genres"])
+        row_id = self.first_ids[GENRE_TITLES.name]
+        for title_id in self.ids(TITLES, self.options["titles"]):
+            count = self.rng.randint(
+                1, min(self.options["max_genres"], len(genres))
+            )
+            for genre_id in self.rng.sample(genres, count):
+                yield row_id, title_id, genre_id
+                row_id += 1
+
+    def plan_reviews(self):
+        """Число отзывов каждого произведения и id его первого отзыва.
+
+        Популярность произведений распределена по Ципфу, порядок
+        произведений по популярности случаен.
+        """
+        title_ids = list(self.ids(TITLES, self.options["titles"]))
+        self.rng.shuffle(title_ids)
+        counts = zipf_counts(
+            self.options["reviews"],
+            len(title_ids),
+            self.options["zipf"],
+            self.options["users"],
+        )
+        starts = list(
+            accumulate([self.first_ids[REVIEWS.name]] + counts[:-1])
+        )
+        return list(zip(title_ids, counts, starts))
+
+    def reviews(self, plan):
+        users = self.ids(USERS, self.options["users"])
+        for title_id, count, start in plan:
+            mean = self.rng.uniform(3, 9)
+            # разные авторы: у пары (автор, произведение) один отзыв
+            authors = self.rng.sample(users, count)
+            for review_id, author_id in zip(range(start, start + count),
+                                            authors):
+                score = round(self.rng.gauss(mean, 2))
+                yield (
+                    review_id,
+                    f"Отзыв {review_id}",
+                    min(max(score, 1), 10),
+                    self.random_date(),
+                    author_id,
+                    title_id,
+                )
+
+    def comments(self, plan):
+        plan = [row for row in plan if row[1]]
+        if not plan:
+            return
+        # у популярных произведений больше и комментариев
+        cum_weights = list(
+            accumulate(zipf_weights(len(plan), self.options["zipf"]))
+        )
+        users = self.ids(USERS, self.options["users"])
+        for comment_id in self.ids(COMMENTS, self.options["comments"]):
+            point = self.rng.random() * cum_weights[-1]
+            _, count, start = plan[bisect_left(cum_weights, point)]
+            yield (
+                comment_id,
+                f"Комментарий {comment_id}",
+                self.random_date(),
+                self.rng.choice(users),
+                start + self.rng.randrange(count),
+            )
+
+    def datasets(self):
+        plan = self.plan_reviews()
+        return (
+            (USERS, self.users()),
+            (CATEGORIES, self.categories()),
+            (GENRES, self.genres()),
+            (TITLES, self.titles()),
+            (GENRE_TITLES, self.genre_titles()),
+            (REVIEWS, self.reviews(plan)),
+            (COMMENTS, self.comments(plan)),
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует синтетические данные: в CSV-файлы в формате "
+        "static/data или сразу в базу данных."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--categories", type=int, default=3)
+        parser.add_argument("--genres", type=int, default=15)
+        parser.add_argument("--titles", type=int, default=1000)
+        parser.add_argument("--reviews", type=int, default=10000)
+        parser.add_argument("--comments", type=int, default=10000)
+        parser.add_argument(
+            "--max-genres",
+            type=int,
+            default=3,
+            help="Наибольшее число жанров у произведения.",
+        )
+        parser.add_argument(
+            "--zipf",
+            type=float,
+            default=1.1,
+            help="Показатель распределения Ципфа отзывов по произведениям.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Сколько строк вставлять одним bulk_create.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Каталог для CSV-файлов. Без него данные пишутся в базу.",
+        )
+
+    def handle(self, *args, **options):
+        for name in ("users", "categories", "genres", "titles"):
+            if options[name] < 1:
+                raise CommandError(f"--{name} должно быть больше нуля.")
+        if options["reviews"] > options["titles"] * options["users"]:
+            raise CommandError(
+                "Отзывов больше, чем пар произведение-автор: каждый "
+                "пользователь оставляет не больше одного отзыва."
+            )
+        if options["comments"] and not options["reviews"]:
+            raise CommandError("Для комментариев нужны отзывы.")
+
+        if options["output"]:
+            os.makedirs(options["output"], exist_ok=True)
+            first_ids = {dataset.name: 1 for dataset in DATASETS}
+        else:
+            first_ids = {
+                dataset.name: (
+                    dataset.model.objects.aggregate(last=Max("pk"))["last"]
+                    or 0
+                ) + 1
+                for dataset in DATASETS
+            }
+        generator = Generator(options, first_ids)
+        for dataset, rows in generator.datasets():
+            if options["output"]:
+                count = self.write_csv(dataset, rows, options["output"])
+            else:
+                with transaction.atomic():
+                    count = self.insert(dataset, rows, options["batch_size"])
+            self.stdout.write(f"{dataset.filename}: строк {count}")
+
+        if not options["output"]:
+            reset_sequences([dataset.model for dataset in DATASETS])
+            Title.objects.refresh_rating()
+            get_search_backend().rebuild()
+            TitleRanking.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS("Генерация завершена."))
+
+    def write_csv(self, dataset, rows, directory):
+        count = 0
+        path = os.path.join(directory, dataset.filename)
+        with open(path, "w", encoding="utf-8", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(dataset.columns)
+            for row in rows:
+                writer.writerow([format_value(value) for value in row])
+                count += 1
+        return count
+
+    def insert(self, dataset, rows, batch_size):
+        attnames = [field.attname for field in dataset.fields]
+        count = 0
+        while True:
+            batch = [
+                dataset.model(**dict(zip(attnames, row)))
+                for row in islice(rows, batch_size)
+            ]
+            if not batch:
+                break
+            dataset.model.objects.bulk_create(batch)
+            count += len(batch)
+        return count
@@ -0,0 +1,100 @@
+import csv
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.datasets import (
+    DATA_DIR,
+    DATASETS,
+    GENRE_TITLES,
+    REVIEWS,
+    TITLES,
+    reset_sequences,
+)
+from reviews.models import Title, TitleRanking
+from reviews.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Загружает данные из CSV-файлов static/data в базу данных."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=DATA_DIR,
+            help="Каталог с CSV-файлами.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Сколько строк вставлять одним bulk_create.",
+        )
+        parser.add_argument(
+            "--only",
+            nargs="+",
+            choices=[dataset.name for dataset in DATASETS],
+            help="Загрузить только указанные файлы.",
+        )
+        parser.add_argument(
+            "--benchmark",
+            action="store_true",
+            help="Показать скорость загрузки каждого файла.",
+        )
+
+    def handle(self, *args, **options):
+        datasets = [
+            dataset for dataset in DATASETS
+            if not options["only"] or dataset.name in options["only"]
+        ]
+        for dataset in datasets:
+            path = os.path.join(options["path"], dataset.filename)
+            if not os.path.exists(path):
+                raise CommandError(f"Файл {path} не найден.")
+
+        for dataset in datasets:
+            path = os.path.join(options["path"], dataset.filename)
+            started = time.perf_counter()
+            with transaction.atomic():
+                rows = self.load(dataset, path, options["batch_size"])
+            elapsed = time.perf_counter() - started
+            message = f"{dataset.filename}: загружено строк {rows}"
+            if options["benchmark"]:
+                message += (
+                    f" за {elapsed:.2f} с "
+                    f"({rows / elapsed if elapsed else 0:.0f} строк/с)"
+                )
+            self.stdout.write(message)
+
+        reset_sequences([dataset.model for dataset in datasets])
+        if REVIEWS in datasets:
+            Title.objects.refresh_rating()
+        if REVIEWS in datasets or TITLES in datasets:
+            get_search_backend().rebuild()
+        if {REVIEWS, TITLES, GENRE_TITLES} & set(datasets):
+            TitleRanking.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS("Загрузка завершена."))
+
+    def load(self, dataset, path, batch_size):
+        rows = 0
+        with open(path, encoding="utf-8", newline="") as csv_file:
+            reader = csv.DictReader(csv_file)
+            missing = set(dataset.columns) - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(
+                    f"В файле {path} нет столбцов: "
+                    + ", ".join(sorted(missing))
+                )
+            while True:
+                batch = [
+                    dataset.to_instance(row)
+                    for row in islice(reader, batch_size)
+                ]
+                if not batch:
+                    break
+                dataset.model.objects.bulk_create(batch)
+                rows += len(batch)
+        return rows
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Перестраивает полнотекстовый индекс произведений и отзывов."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            get_search_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS("Поисковый индекс перестроен."))
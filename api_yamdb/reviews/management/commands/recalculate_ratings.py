@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает рейтинги всех произведений по таблице отзывов."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Сколько произведений пересчитывать в одной транзакции.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = Title.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+        updated = 0
+        for start in range(0, last_id + 1, batch_size):
+            with transaction.atomic():
+                updated += Title.objects.filter(
+                    pk__gte=start, pk__lt=start + batch_size
+                ).refresh_rating()
+        self.stdout.write(
+            self.style.SUCCESS(f"Пересчитано произведений: {updated}")
+        )
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from reviews.models import Title, TitleRanking
+
+
+class Command(BaseCommand):
+    help = (
+        "Перестраивает таблицы лидеров и показывает среднюю оценку по "
+        "базе для настройки LEADERBOARD_PRIOR_MEAN."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            TitleRanking.objects.rebuild()
+        totals = Title.objects.aggregate(
+            score_sum=Sum("score_sum"), reviews_count=Sum("reviews_count")
+        )
+        if totals["reviews_count"]:
+            mean = totals["score_sum"] / totals["reviews_count"]
+            self.stdout.write(
+                f"Средняя оценка: {mean:.2f}, "
+                f"LEADERBOARD_PRIOR_MEAN = {settings.LEADERBOARD_PRIOR_MEAN}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Строк в таблицах лидеров: {TitleRanking.objects.count()}"
+            )
+        )
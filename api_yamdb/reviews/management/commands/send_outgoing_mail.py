@@ -0,0 +1,118 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from reviews.models import OutgoingMail
+
+
+class Command(BaseCommand):
+    help = (
+        "Отправляет письма из очереди исходящей почты пачками "
+        "через одно соединение с почтовым сервером."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Сколько писем отправлять через одно соединение.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=5,
+            help="После стольких неудачных попыток письмо "
+            "больше не отправляется.",
+        )
+        parser.add_argument(
+            "--backoff",
+            type=float,
+            default=30,
+            help="Задержка перед первой повторной попыткой, в секундах; "
+            "удваивается с каждой попыткой.",
+        )
+        parser.add_argument(
+            "--lease",
+            type=float,
+            default=300,
+            help="На сколько секунд пачка закрепляется за обработчиком; "
+            "неотправленные письма упавшего обработчика вернутся в очередь.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Не завершаться, а ждать новые письма.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Пауза между проверками очереди в режиме --loop, в секундах.",
+        )
+
+    def handle(self, *args, **options):
+        sent = failed = 0
+        while True:
+            batch_sent, batch_failed = self.send_batch(
+                options["batch_size"],
+                options["max_attempts"],
+                options["backoff"],
+                options["lease"],
+            )
+            sent += batch_sent
+            failed += batch_failed
+            if batch_sent + batch_failed:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Отправлено писем: {sent}, с ошибкой: {failed}"
+            )
+        )
+
+    def send_batch(self, batch_size, max_attempts, backoff, lease):
+        mails = OutgoingMail.objects.claim(max_attempts, batch_size, lease)
+        if not mails:
+            return 0, 0
+        sent_ids = []
+        failures = []
+        try:
+            with get_connection(fail_silently=False) as connection:
+                for mail in mails:
+                    message = EmailMessage(
+                        mail.subject,
+                        mail.body,
+                        mail.from_email,
+                        [mail.recipient],
+                        connection=connection,
+                    )
+                    try:
+                        message.send()
+                    except Exception as error:
+                        failures.append((mail, error))
+                    else:
+                        sent_ids.append(mail.pk)
+        except Exception as error:
+            sent = set(sent_ids)
+            failed = {mail.pk for mail, _ in failures}
+            failures.extend(
+                (mail, error)
+                for mail in mails
+                if mail.pk not in sent and mail.pk not in failed
+            )
+
+        OutgoingMail.objects.filter(pk__in=sent_ids).update(sent_at=now())
+        for mail, error in failures:
+            mail.attempts += 1
+            mail.send_after = now() + timedelta(
+                seconds=backoff * 2 ** (mail.attempts - 1)
+            )
+            mail.last_error = repr(error)
+            mail.save(update_fields=["attempts", "send_after", "last_error"])
+        return len(sent_ids), len(failures)
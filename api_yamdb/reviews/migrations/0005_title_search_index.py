@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import migrations
+
+# SQL зафиксирован на момент миграции: reviews.search может меняться,
+# а миграция должна создавать ту же таблицу, что и при выпуске.
+SQLITE_INSTALL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS reviews_title_search "
+    "USING fts5(name, description, reviews, tokenize = 'unicode61')",
+    "INSERT INTO reviews_title_search (rowid, name, description, reviews) "
+    "SELECT t.id, t.name, t.description, "
+    "COALESCE((SELECT group_concat(r.text, ' ') "
+    "FROM reviews_review r WHERE r.title_id = t.id), '') "
+    "FROM reviews_title t",
+]
+
+POSTGRES_INSTALL = [
+    "CREATE TABLE IF NOT EXISTS reviews_title_search ("
+    "title_id integer PRIMARY KEY REFERENCES reviews_title (id) "
+    "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS reviews_title_search_document_idx "
+    "ON reviews_title_search USING GIN (document)",
+    "INSERT INTO reviews_title_search (title_id, document) "
+    "SELECT t.id, "
+    "setweight(to_tsvector('{config}', t.name), 'A') || "
+    "setweight(to_tsvector('{config}', t.description), 'B') || "
+    "setweight(to_tsvector('{config}', COALESCE(("
+    "SELECT string_agg(r.text, ' ') FROM reviews_review r "
+    "WHERE r.title_id = t.id), '')), 'C') "
+    "FROM reviews_title t",
+]
+
+INSTALL = {
+    "sqlite": SQLITE_INSTALL,
+    "postgresql": POSTGRES_INSTALL,
+}
+
+
+def create_search_index(apps, schema_editor):
+    statements = INSTALL.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(
+            statement.replace("{config}", settings.SEARCH_CONFIG)
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in INSTALL:
+        schema_editor.execute("DROP TABLE IF EXISTS reviews_title_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_outgoing_mail'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.conf import settings
+
+# SQL зафиксирован на момент миграции: TitleRanking.objects.rebuild()
+# может меняться вместе с моделью, а заполнение должно остаться прежним.
+FILL_RANKINGS = (
+    "INSERT INTO reviews_titleranking "
+    "(scope, scope_key, title_id, reviews_count, weighted_rating) "
+    + " UNION ALL ".join(
+        "SELECT %s, {}, t.id, t.reviews_count, "
+        "(t.score_sum + %s) / (t.reviews_count + %s) "
+        "FROM reviews_title t {}".format(scope_key, join)
+        for scope_key, join in (
+            ("0", ""),
+            ("t.category_id", ""),
+            ("t.year", ""),
+            ("g.genre_id", "JOIN reviews_title_genre g ON g.title_id = t.id"),
+        )
+    )
+)
+SCOPES = ("all", "category", "year", "genre")
+
+
+def fill_rankings(apps, schema_editor):
+    weight = float(settings.LEADERBOARD_PRIOR_WEIGHT)
+    prior = weight * settings.LEADERBOARD_PRIOR_MEAN
+    schema_editor.execute(
+        FILL_RANKINGS,
+        [param for scope in SCOPES for param in (scope, prior, weight)],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('all', 'Все произведения'), ('category', 'Категория'), ('genre', 'Жанр'), ('year', 'Год')], max_length=10, verbose_name='Область')),
+                ('scope_key', models.PositiveIntegerField(default=0, verbose_name='id категории или жанра, год')),
+                ('reviews_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('weighted_rating', models.FloatField(verbose_name='Взвешенный рейтинг')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.Title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Место в таблице лидеров',
+                'verbose_name_plural': 'Таблицы лидеров',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['scope', 'scope_key', '-weighted_rating', '-title'], name='title_ranking_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['scope', 'scope_key', '-reviews_count', '-title'], name='title_ranking_reviews_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='titleranking',
+            constraint=models.UniqueConstraint(fields=('scope', 'scope_key', 'title'), name='title_ranking_scope_title'),
+        ),
+        migrations.RunPython(fill_rankings, migrations.RunPython.noop),
+    ]
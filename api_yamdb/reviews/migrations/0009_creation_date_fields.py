@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:41
+
+from django.db import migrations
+import reviews.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_ordering_indexes'),
+    ]
+
+    # Столбцы не меняются: новая логика только в pre_save поля,
+    # поэтому SQLite не пересоздает таблицы.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='comment',
+                    name='pub_date',
+                    field=reviews.models.CreationDateTimeField(blank=True, editable=False),
+                ),
+                migrations.AlterField(
+                    model_name='review',
+                    name='pub_date',
+                    field=reviews.models.CreationDateTimeField(blank=True, editable=False, verbose_name='Дата публикации'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.db import migrations
+
+# Тексты отзывов переезжают из документа произведения в отдельные строки:
+# запись отзыва больше не пересобирает документ из всех отзывов.
+SQLITE_FORWARD = [
+    "DROP TABLE IF EXISTS reviews_title_search",
+    "CREATE VIRTUAL TABLE reviews_title_search "
+    "USING fts5(name, description, tokenize = 'unicode61')",
+    "CREATE VIRTUAL TABLE reviews_review_search "
+    "USING fts5(text, title_id UNINDEXED, tokenize = 'unicode61')",
+    "INSERT INTO reviews_title_search (rowid, name, description) "
+    "SELECT id, name, description FROM reviews_title",
+    "INSERT INTO reviews_review_search (rowid, text, title_id) "
+    "SELECT id, text, title_id FROM reviews_review",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS reviews_review_search",
+    "DROP TABLE IF EXISTS reviews_title_search",
+    "CREATE VIRTUAL TABLE reviews_title_search "
+    "USING fts5(name, description, reviews, tokenize = 'unicode61')",
+    "INSERT INTO reviews_title_search (rowid, name, description, reviews) "
+    "SELECT t.id, t.name, t.description, "
+    "COALESCE((SELECT group_concat(r.text, ' ') "
+    "FROM reviews_review r WHERE r.title_id = t.id), '') "
+    "FROM reviews_title t",
+]
+
+POSTGRES_FORWARD = [
+    "DELETE FROM reviews_title_search",
+    "INSERT INTO reviews_title_search (title_id, document) "
+    "SELECT id, "
+    "setweight(to_tsvector('{config}', name), 'A') || "
+    "setweight(to_tsvector('{config}', description), 'B') "
+    "FROM reviews_title",
+    "CREATE TABLE reviews_review_search ("
+    "review_id integer PRIMARY KEY REFERENCES reviews_review (id) "
+    "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+    "title_id integer NOT NULL, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX reviews_review_search_document_idx "
+    "ON reviews_review_search USING GIN (document)",
+    "INSERT INTO reviews_review_search (review_id, title_id, document) "
+    "SELECT id, title_id, to_tsvector('{config}', text) "
+    "FROM reviews_review",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP TABLE IF EXISTS reviews_review_search",
+    "DELETE FROM reviews_title_search",
+    "INSERT INTO reviews_title_search (title_id, document) "
+    "SELECT t.id, "
+    "setweight(to_tsvector('{config}', t.name), 'A') || "
+    "setweight(to_tsvector('{config}', t.description), 'B') || "
+    "setweight(to_tsvector('{config}', COALESCE(("
+    "SELECT string_agg(r.text, ' ') FROM reviews_review r "
+    "WHERE r.title_id = t.id), '')), 'C') "
+    "FROM reviews_title t",
+]
+
+FORWARD = {"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}
+BACKWARD = {"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRES_BACKWARD}
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(
+                statement.replace("{config}", settings.SEARCH_CONFIG)
+            )
+
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_modified_dates'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(FORWARD), run(BACKWARD)),
+    ]
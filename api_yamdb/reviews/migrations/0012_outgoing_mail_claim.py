@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_review_search_rows'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingmail',
+            name='claim',
+            field=models.CharField(blank=True, editable=False, max_length=32, verbose_name='Метка обработчика'),
+        ),
+    ]
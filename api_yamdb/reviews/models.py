@@ -1,11 +1,43 @@
 import binascii
 import os
+from datetime import timedelta
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models import (
+    Avg,
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    OuterRef,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils.timezone import now
 
 from .validators import year_validator, score_validator
 
+
+class CreationDateTimeField(models.DateTimeField):
+    """Дата создания: как auto_now_add, но заданная дата сохраняется.
+
+    Загрузка данных передаёт даты из файла прямо в bulk_create.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("editable", False)
+        kwargs.setdefault("blank", True)
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        if add and getattr(model_instance, self.attname) is None:
+            setattr(model_instance, self.attname, now())
+        return super().pre_save(model_instance, add)
+
+
 USER = "user"
 MODERATOR = "moderator"
 ADMIN = "admin"
@@ -69,6 +101,62 @@ class Category(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+    def touch(self):
+        """Сдвигает дату изменения: меняются ETag и Last-Modified."""
+        return self.update(modified=now())
+
+    def add_scores(self, score_delta, count_delta):
+        """Инкрементально обновляет агрегаты рейтинга одним UPDATE."""
+        score_sum = F("score_sum") + score_delta
+        reviews_count = F("reviews_count") + count_delta
+        updated = self.update(
+            score_sum=score_sum,
+            reviews_count=reviews_count,
+            rating=ExpressionWrapper(
+                Cast(score_sum, FloatField()) / NullIf(reviews_count, 0),
+                output_field=FloatField(),
+            ),
+            modified=now(),
+        )
+        self.update_rankings()
+        return updated
+
+    def update_rankings(self):
+        """Переносит новые агрегаты в строки таблицы лидеров."""
+        TitleRanking.objects.using(self.db).filter(
+            title__in=self.values("pk")
+        ).update_scores()
+
+    def refresh_rating(self):
+        """Пересчитывает агрегаты рейтинга по таблице отзывов.
+
+        Нужен для путей, которые обходят сигналы модели Review:
+        bulk_create, QuerySet.update и загрузка данных.
+        """
+        reviews = (
+            Review.objects.filter(title=OuterRef("pk"))
+            .order_by()
+            .values("title")
+        )
+        updated = self.update(
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum("score")).values("total")),
+                0,
+            ),
+            reviews_count=Coalesce(
+                Subquery(reviews.annotate(total=Count("id")).values("total")),
+                0,
+            ),
+            rating=Subquery(
+                reviews.annotate(average=Avg("score")).values("average")
+            ),
+            modified=now(),
+        )
+        self.update_rankings()
+        return updated
+
+
 class Title(models.Model):
     name = models.CharField(
         max_length=200, db_index=True, verbose_name="Название"
@@ -84,10 +172,41 @@ class Title(models.Model):
     )
     genre = models.ManyToManyField(Genre, verbose_name="Жанр произведения")
     description = models.TextField(blank=True)
+    score_sum = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Сумма оценок"
+    )
+    reviews_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Количество отзывов"
+    )
+    rating = models.FloatField(
+        null=True, editable=False, verbose_name="Рейтинг"
+    )
+    modified = models.DateTimeField(
+        auto_now=True, verbose_name="Дата изменения"
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Произведение"
         verbose_name_plural = "Произведения"
+        indexes = [
+            models.Index(
+                fields=["category", "-id"], name="title_category_id_idx"
+            ),
+            # годы читаются и по убыванию id (фильтр ?year=, обратный
+            # проход), и по возрастанию (?ordering=year)
+            models.Index(fields=["year", "id"], name="title_year_id_idx"),
+            # сортировки ?ordering=: TieBreakOrderingFilter добавляет id
+            models.Index(fields=["rating", "id"], name="title_rating_id_idx"),
+            models.Index(
+                fields=["reviews_count", "id"],
+                name="title_reviews_count_id_idx",
+            ),
+            models.Index(fields=["name", "id"], name="title_name_id_idx"),
+            # валидаторы условных GET-запросов: Max(modified)
+            models.Index(fields=["modified"], name="title_modified_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -110,8 +229,9 @@ class Review(models.Model):
     score = models.PositiveSmallIntegerField(
         validators=[score_validator], verbose_name="Оценка"
     )
-    pub_date = models.DateTimeField(
-        auto_now_add=True, verbose_name="Дата публикации"
+    pub_date = CreationDateTimeField(verbose_name="Дата публикации")
+    modified = models.DateTimeField(
+        auto_now=True, verbose_name="Дата изменения"
     )
 
     class Meta:
@@ -122,10 +242,35 @@ class Review(models.Model):
                 fields=["title", "author"], name="author_review_title"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["title", "pub_date"], name="review_title_pub_date_idx"
+            ),
+            models.Index(
+                fields=["title", "modified"], name="review_title_modified_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.title.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_loaded_score()
+        return instance
+
+    def remember_loaded_score(self):
+        self._loaded_title_id = self.__dict__.get("title_id")
+        self._loaded_score = self.__dict__.get("score")
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            return super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     text = models.TextField(verbose_name="Текст комментария")
@@ -141,8 +286,232 @@ class Comment(models.Model):
         related_name="comments",
         verbose_name="Автор комментария",
     )
-    pub_date = models.DateTimeField(auto_now_add=True)
+    pub_date = CreationDateTimeField()
+    modified = models.DateTimeField(
+        auto_now=True, verbose_name="Дата изменения"
+    )
 
     class Meta:
         verbose_name = "Комментарий к отзыву"
         verbose_name_plural = "Комментарии к отзыву"
+        indexes = [
+            models.Index(
+                fields=["review", "pub_date"],
+                name="comment_review_pub_date_idx",
+            ),
+            models.Index(
+                fields=["review", "modified"],
+                name="comment_review_modified_idx",
+            ),
+        ]
+
+
+def weighted_rating():
+    """Байесовский рейтинг: средняя оценка, стянутая к априорной.
+
+    (score_sum + m * C) / (reviews_count + m): пока отзывов меньше m,
+    рейтинг ближе к C, чем к собственной средней оценке.
+    """
+    weight = settings.LEADERBOARD_PRIOR_WEIGHT
+    prior = weight * settings.LEADERBOARD_PRIOR_MEAN
+    return ExpressionWrapper(
+        (Cast(F("score_sum"), FloatField()) + prior)
+        / (F("reviews_count") + weight),
+        output_field=FloatField(),
+    )
+
+
+class TitleRankingQuerySet(models.QuerySet):
+    def update_scores(self):
+        """Обновляет строки по текущим агрегатам произведений."""
+        titles = Title.objects.filter(pk=OuterRef("title_id"))
+        return self.update(
+            reviews_count=Subquery(titles.values("reviews_count")[:1]),
+            weighted_rating=Subquery(
+                titles.annotate(weighted=weighted_rating()).values(
+                    "weighted"
+                )[:1]
+            ),
+        )
+
+    def rebuild(self, title_ids=None):
+        """Заново раскладывает произведения по областям.
+
+        Без title_ids пересобирает всю таблицу. Нужен при создании и
+        изменении произведений: категория, год и жанры определяют, в
+        какие таблицы лидеров попадает произведение.
+        """
+        using = self.db
+        where, params = "1 = 1", []
+        if title_ids is not None:
+            title_ids = [title_id for title_id in title_ids if title_id]
+            if not title_ids:
+                return
+            where = "t.id IN ({})".format(", ".join(["%s"] * len(title_ids)))
+            params = title_ids
+            self.filter(title_id__in=title_ids).delete()
+        else:
+            self.all().delete()
+
+        weight = settings.LEADERBOARD_PRIOR_WEIGHT
+        prior = weight * settings.LEADERBOARD_PRIOR_MEAN
+        ranking_table = TitleRanking._meta.db_table
+        title_table = Title._meta.db_table
+        genre_table = Title.genre.through._meta.db_table
+        sources = (
+            (TitleRanking.ALL, "0", ""),
+            (TitleRanking.CATEGORY, "t.category_id", ""),
+            (TitleRanking.YEAR, "t.year", ""),
+            (
+                TitleRanking.GENRE,
+                "g.genre_id",
+                f"JOIN {genre_table} g ON g.title_id = t.id",
+            ),
+        )
+        selects = [
+            f"SELECT %s, {scope_key}, t.id, t.reviews_count, "
+            "(t.score_sum + %s) / (t.reviews_count + %s) "
+            f"FROM {title_table} t {join} WHERE {where}"
+            for _, scope_key, join in sources
+        ]
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {ranking_table} "
+                "(scope, scope_key, title_id, reviews_count, weighted_rating) "
+                + " UNION ALL ".join(selects),
+                [
+                    param
+                    for scope, _, _ in sources
+                    for param in [scope, float(prior), float(weight)] + params
+                ],
+            )
+
+
+class TitleRanking(models.Model):
+    """Место произведения в таблице лидеров одной области.
+
+    Для каждого произведения хранятся строки общей таблицы, таблиц его
+    категории, года и каждого из жанров, поэтому страница лидеров
+    читается по индексу без сортировки всех произведений.
+    """
+
+    ALL = "all"
+    CATEGORY = "category"
+    GENRE = "genre"
+    YEAR = "year"
+    SCOPE_CHOICE = (
+        (ALL, "Все произведения"),
+        (CATEGORY, "Категория"),
+        (GENRE, "Жанр"),
+        (YEAR, "Год"),
+    )
+
+    scope = models.CharField(
+        choices=SCOPE_CHOICE, max_length=10, verbose_name="Область"
+    )
+    scope_key = models.PositiveIntegerField(
+        default=0, verbose_name="id категории или жанра, год"
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name="rankings",
+        verbose_name="Произведение",
+    )
+    reviews_count = models.PositiveIntegerField(
+        default=0, verbose_name="Количество отзывов"
+    )
+    weighted_rating = models.FloatField(verbose_name="Взвешенный рейтинг")
+
+    objects = TitleRankingQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Место в таблице лидеров"
+        verbose_name_plural = "Таблицы лидеров"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "scope_key", "title"],
+                name="title_ranking_scope_title",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["scope", "scope_key", "-weighted_rating", "-title"],
+                name="title_ranking_rating_idx",
+            ),
+            models.Index(
+                fields=["scope", "scope_key", "-reviews_count", "-title"],
+                name="title_ranking_reviews_idx",
+            ),
+        ]
+
+
+class OutgoingMailQuerySet(models.QuerySet):
+    def pending(self, max_attempts):
+        return self.filter(
+            sent_at__isnull=True,
+            attempts__lt=max_attempts,
+            send_after__lte=now(),
+        ).order_by("send_after", "id")
+
+    def claim(self, max_attempts, batch_size, lease):
+        """Закрепляет за вызывающим до batch_size писем и возвращает их.
+
+        Письма помечаются случайной меткой одним UPDATE с повторной
+        проверкой условий очереди, поэтому два обработчика не получат
+        одно письмо. send_after сдвигается на lease секунд: если
+        обработчик упадёт, письма вернутся в очередь.
+        """
+        ids = list(
+            self.pending(max_attempts).values_list("pk", flat=True)[
+                :batch_size
+            ]
+        )
+        if not ids:
+            return []
+        claim = binascii.hexlify(os.urandom(16)).decode()
+        self.pending(max_attempts).filter(pk__in=ids).update(
+            claim=claim, send_after=now() + timedelta(seconds=lease)
+        )
+        return list(self.filter(claim=claim).order_by("id"))
+
+
+class OutgoingMail(models.Model):
+    subject = models.CharField(max_length=200, verbose_name="Тема")
+    body = models.TextField(verbose_name="Текст письма")
+    from_email = models.EmailField(verbose_name="Отправитель")
+    recipient = models.EmailField(verbose_name="Получатель")
+    created = models.DateTimeField(
+        auto_now_add=True, verbose_name="Дата постановки в очередь"
+    )
+    send_after = models.DateTimeField(
+        default=now, verbose_name="Отправить не раньше"
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Попыток отправки"
+    )
+    sent_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Дата отправки"
+    )
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    claim = models.CharField(
+        max_length=32,
+        blank=True,
+        editable=False,
+        verbose_name="Метка обработчика",
+    )
+
+    objects = OutgoingMailQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+        indexes = [
+            models.Index(
+                fields=["sent_at", "send_after"],
+                name="outgoing_mail_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject}"
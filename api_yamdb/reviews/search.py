@@ -0,0 +1,222 @@
+import abc
+import re
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Review, Title
+
+TITLE_TABLE = Title._meta.db_table
+REVIEW_TABLE = Review._meta.db_table
+SEARCH_TABLE = "reviews_title_search"
+REVIEW_SEARCH_TABLE = "reviews_review_search"
+WORDS = re.compile(r"\w+")
+
+
+class RawIds(RawSQL):
+    """Подзапрос id для `pk__in`.
+
+    RawSQL заключает SQL в скобки, а In в Django 2.2 добавляет свои:
+    `IN ((SELECT ...))` SQLite читает как скалярный подзапрос и берёт
+    только первую строку.
+    """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+class LikeSearchBackend:
+    """Поиск через LIKE: работает везде, но просматривает всю таблицу."""
+
+    def index_titles(self, title_ids, using=DEFAULT_DB_ALIAS):
+        pass
+
+    def remove_titles(self, title_ids, using=DEFAULT_DB_ALIAS):
+        pass
+
+    def index_reviews(self, review_ids, using=DEFAULT_DB_ALIAS):
+        pass
+
+    def remove_reviews(self, review_ids, using=DEFAULT_DB_ALIAS):
+        pass
+
+    def rebuild(self, using=DEFAULT_DB_ALIAS):
+        pass
+
+    def search(self, queryset, query):
+        condition = Q()
+        for word in WORDS.findall(query):
+            condition &= (
+                Q(name__icontains=word)
+                | Q(description__icontains=word)
+                | Q(reviews__text__icontains=word)
+            )
+        return queryset.filter(condition).distinct()
+
+
+class IndexedSearchBackend(LikeSearchBackend, metaclass=abc.ABCMeta):
+    """Поддерживает таблицы SEARCH_TABLE и REVIEW_SEARCH_TABLE.
+
+    В первой строка на произведение: название и описание, во второй
+    строка на отзыв. Запись отзыва переиндексирует только его строку,
+    поэтому её стоимость не зависит от числа отзывов произведения.
+    Таблицы создаются миграциями.
+    """
+
+    title_key = None
+    review_key = None
+
+    @abc.abstractmethod
+    def insert_titles(self, where):
+        """INSERT строк произведений из TITLE_TABLE t по условию where."""
+
+    @abc.abstractmethod
+    def insert_reviews(self, where):
+        """INSERT строк отзывов из REVIEW_TABLE r по условию where."""
+
+    def replace_rows(self, table, key, ids, using, insert=None):
+        ids = [pk for pk in ids if pk]
+        if not ids:
+            return
+        placeholders = ", ".join(["%s"] * len(ids))
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {key} IN ({placeholders})", ids
+            )
+            if insert is not None:
+                cursor.execute(insert(f"id IN ({placeholders})"), ids)
+
+    def index_titles(self, title_ids, using=DEFAULT_DB_ALIAS):
+        self.replace_rows(
+            SEARCH_TABLE, self.title_key, title_ids, using, self.insert_titles
+        )
+
+    def remove_titles(self, title_ids, using=DEFAULT_DB_ALIAS):
+        self.replace_rows(SEARCH_TABLE, self.title_key, title_ids, using)
+
+    def index_reviews(self, review_ids, using=DEFAULT_DB_ALIAS):
+        self.replace_rows(
+            REVIEW_SEARCH_TABLE,
+            self.review_key,
+            review_ids,
+            using,
+            self.insert_reviews,
+        )
+
+    def remove_reviews(self, review_ids, using=DEFAULT_DB_ALIAS):
+        self.replace_rows(
+            REVIEW_SEARCH_TABLE, self.review_key, review_ids, using
+        )
+
+    def rebuild(self, using=DEFAULT_DB_ALIAS):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+            cursor.execute(f"DELETE FROM {REVIEW_SEARCH_TABLE}")
+            cursor.execute(self.insert_titles("1 = 1"))
+            cursor.execute(self.insert_reviews("1 = 1"))
+
+
+class SQLiteFTSBackend(IndexedSearchBackend):
+    title_key = "rowid"
+    review_key = "rowid"
+
+    def insert_titles(self, where):
+        return (
+            f"INSERT INTO {SEARCH_TABLE} (rowid, name, description) "
+            f"SELECT id, name, description FROM {TITLE_TABLE} WHERE {where}"
+        )
+
+    def insert_reviews(self, where):
+        return (
+            f"INSERT INTO {REVIEW_SEARCH_TABLE} (rowid, text, title_id) "
+            f"SELECT id, text, title_id FROM {REVIEW_TABLE} WHERE {where}"
+        )
+
+    def search(self, queryset, query):
+        words = WORDS.findall(query)
+        if not words:
+            return queryset
+        matches = [f'"{word}"*' for word in words]
+        # каждое слово ищется в произведении или в любом его отзыве;
+        # условие не ссылается на внешнюю таблицу, поэтому queryset
+        # можно вложить в другой запрос, например для фасетов
+        ids = (
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+            f"UNION SELECT title_id FROM {REVIEW_SEARCH_TABLE} "
+            f"WHERE {REVIEW_SEARCH_TABLE} MATCH %s"
+        )
+        for match in matches:
+            queryset = queryset.filter(pk__in=RawIds(ids, [match, match]))
+        rank = (
+            f"COALESCE((SELECT bm25({SEARCH_TABLE}, 10.0, 3.0) "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+            f"AND rowid = {TITLE_TABLE}.id), 0)"
+        )
+        return queryset.extra(
+            select={"search_rank": rank},
+            select_params=[" OR ".join(matches)],
+        ).order_by("search_rank", "-id")
+
+
+class PostgresSearchBackend(IndexedSearchBackend):
+    title_key = "title_id"
+    review_key = "review_id"
+
+    def insert_titles(self, where):
+        config = settings.SEARCH_CONFIG
+        return (
+            f"INSERT INTO {SEARCH_TABLE} (title_id, document) "
+            "SELECT id, "
+            f"setweight(to_tsvector('{config}', name), 'A') || "
+            f"setweight(to_tsvector('{config}', description), 'B') "
+            f"FROM {TITLE_TABLE} WHERE {where}"
+        )
+
+    def insert_reviews(self, where):
+        config = settings.SEARCH_CONFIG
+        return (
+            f"INSERT INTO {REVIEW_SEARCH_TABLE} "
+            "(review_id, title_id, document) "
+            f"SELECT id, title_id, to_tsvector('{config}', text) "
+            f"FROM {REVIEW_TABLE} WHERE {where}"
+        )
+
+    def search(self, queryset, query):
+        words = WORDS.findall(query)
+        if not words:
+            return queryset
+        config = settings.SEARCH_CONFIG
+        tsqueries = [f"{word}:*" for word in words]
+        ids = (
+            f"SELECT title_id FROM {SEARCH_TABLE} "
+            f"WHERE document @@ to_tsquery('{config}', %s) "
+            f"UNION SELECT title_id FROM {REVIEW_SEARCH_TABLE} "
+            f"WHERE document @@ to_tsquery('{config}', %s)"
+        )
+        for tsquery in tsqueries:
+            queryset = queryset.filter(pk__in=RawIds(ids, [tsquery, tsquery]))
+        rank = (
+            f"COALESCE((SELECT ts_rank(document, "
+            f"to_tsquery('{config}', %s)) FROM {SEARCH_TABLE} "
+            f"WHERE title_id = {TITLE_TABLE}.id), 0)"
+        )
+        return queryset.extra(
+            select={"search_rank": rank},
+            select_params=[" | ".join(tsqueries)],
+        ).order_by("-search_rank", "-id")
+
+
+VENDOR_BACKENDS = {
+    "sqlite": SQLiteFTSBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_search_backend(vendor=None):
+    if settings.SEARCH_BACKEND:
+        return import_string(settings.SEARCH_BACKEND)()
+    vendor = vendor or connections[DEFAULT_DB_ALIAS].vendor
+    return VENDOR_BACKENDS.get(vendor, LikeSearchBackend)()
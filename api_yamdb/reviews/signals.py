@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import Category, Genre, Review, Title, TitleRanking
+from .search import get_search_backend
+
+# bulk_create не отправляет post_save: reviews.datasets.bulk_insert
+# сообщает о пакетно созданных объектах этим сигналом.
+bulk_created = Signal(providing_args=["objs", "using"])
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, raw, using,
+                                 **kwargs):
+    if raw:
+        return
+    titles = Title.objects.using(using)
+    score = int(instance.score)
+    old_title_id = getattr(instance, "_loaded_title_id", None)
+    old_score = getattr(instance, "_loaded_score", None)
+    if created:
+        titles.filter(pk=instance.title_id).add_scores(score, 1)
+    elif old_title_id is None or old_score is None:
+        titles.filter(
+            pk__in={instance.title_id, old_title_id}
+        ).refresh_rating()
+    elif old_title_id != instance.title_id:
+        titles.filter(pk=old_title_id).add_scores(-old_score, -1)
+        titles.filter(pk=instance.title_id).add_scores(score, 1)
+    elif old_score != score:
+        titles.filter(pk=instance.title_id).add_scores(
+            score - old_score, 0
+        )
+    instance.remember_loaded_score()
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, using, **kwargs):
+    Title.objects.using(using).filter(pk=instance.title_id).add_scores(
+        -int(instance.score), -1
+    )
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, raw, using, **kwargs):
+    if not raw:
+        get_search_backend().index_titles([instance.pk], using)
+
+
+@receiver(post_save, sender=Review)
+def index_review(sender, instance, raw, using, **kwargs):
+    if not raw:
+        get_search_backend().index_reviews([instance.pk], using)
+
+
+@receiver(post_delete, sender=Title)
+def remove_title_from_search_index(sender, instance, using, **kwargs):
+    get_search_backend().remove_titles([instance.pk], using)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_search_index(sender, instance, using, **kwargs):
+    get_search_backend().remove_reviews([instance.pk], using)
+
+
+@receiver(post_save, sender=Title)
+def rebuild_title_rankings(sender, instance, raw, using, **kwargs):
+    if raw:
+        return
+    TitleRanking.objects.using(using).rebuild([instance.pk])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def rebuild_rankings_on_genres_change(sender, instance, action, reverse,
+                                      pk_set, using, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    rankings = TitleRanking.objects.using(using)
+    if not reverse:
+        rankings.rebuild([instance.pk])
+    elif pk_set:
+        rankings.rebuild(pk_set)
+    else:
+        # жанр отвязан от всех произведений
+        rankings.filter(
+            scope=TitleRanking.GENRE, scope_key=instance.pk
+        ).delete()
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def remove_scope_rankings(sender, instance, using, **kwargs):
+    scope = TitleRanking.GENRE if sender is Genre else TitleRanking.CATEGORY
+    TitleRanking.objects.using(using).filter(
+        scope=scope, scope_key=instance.pk
+    ).delete()
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
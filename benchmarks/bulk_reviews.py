@@ -0,0 +1,93 @@
+"""Пропускная способность создания отзывов: по одному и пакетами.
+
+Запуск из корня репозитория:
+
+    python benchmarks/bulk_reviews.py --titles 500 --batch-size 100
+
+Данные создаются во временной базе SQLite, рабочая база не меняется.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import setup_django
+
+
+def seed(titles):
+    from reviews.models import Category, Title, User
+
+    category = Category.objects.create(name="Фильм", slug="film")
+    Title.objects.bulk_create(
+        Title(name=f"Произведение {number}", year=2000, category=category)
+        for number in range(titles)
+    )
+    return [
+        User.objects.create(username=name, email=f"{name}@yamdb.fake")
+        for name in ("single", "bulk")
+    ]
+
+
+def api_client(user):
+    from api.authentication import UserClaimsRefreshToken
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    token = UserClaimsRefreshToken.for_user(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+def single(client, title_ids):
+    for title_id in title_ids:
+        response = client.post(
+            f"/api/v1/titles/{title_id}/reviews/",
+            data={"text": "Отзыв", "score": 7},
+        )
+        assert response.status_code == 201, response.content
+
+
+def bulk(client, title_ids, batch_size):
+    for start in range(0, len(title_ids), batch_size):
+        response = client.post(
+            "/api/v1/reviews/bulk/",
+            data=[
+                {"title": title_id, "text": "Отзыв", "score": 7}
+                for title_id in title_ids[start:start + batch_size]
+            ],
+            format="json",
+        )
+        assert response.status_code == 201, response.content
+
+
+def measure(label, func, *args):
+    started = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<8} {len(args[1]) / elapsed:10.1f} отзывов/с")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=100)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, "bench.sqlite3"))
+        from reviews.models import Title
+
+        single_user, bulk_user = seed(options.titles)
+        title_ids = list(Title.objects.values_list("pk", flat=True))
+        single_time = measure(
+            "single", single, api_client(single_user), title_ids
+        )
+        bulk_time = measure(
+            "bulk", bulk, api_client(bulk_user), title_ids, options.batch_size
+        )
+        print(f"ускорение: {single_time / bulk_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
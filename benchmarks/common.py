@@ -0,0 +1,52 @@
+"""Общие части бенчмарков: настройка Django и статистика."""
+import math
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+PROJECT_DIR = ROOT_DIR / "api_yamdb"
+
+
+def setup_django(db_name):
+    """Поднимает проект на отдельной базе SQLite и применяет миграции."""
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ["DB_ENGINE"] = "django.db.backends.sqlite3"
+    os.environ["DB_NAME"] = str(db_name)
+    os.environ.pop("DB_REPLICA_NAME", None)
+    os.environ.pop("DB_REPLICA_HOST", None)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_yamdb.settings")
+    import django
+
+    django.setup()
+    from django.conf import settings
+    from django.core.management import call_command
+
+    # отладочные обёртки курсора и проверки запросов искажают замеры
+    settings.DEBUG = False
+    settings.QUERY_INSPECTION_ENABLED = False
+    call_command("migrate", verbosity=0)
+    call_command("createcachetable", verbosity=0)
+
+
+def git_commit():
+    def git(*args):
+        return subprocess.run(
+            ["git", *args],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+
+    return {
+        "commit": git("rev-parse", "HEAD") or None,
+        "dirty": bool(git("status", "--porcelain", "--", "api_yamdb")),
+    }
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[max(math.ceil(q * len(values)) - 1, 0)]
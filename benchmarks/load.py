@@ -0,0 +1,491 @@
+"""Нагрузочный прогон публичного API через WSGI-приложение в процессе.
+
+Скрипт наполняет базу командой generate_data, отправляет взвешенную
+смесь запросов к TitleViewSet, ReviewViewSet, CommentViewSet и
+TokenObtainView и сохраняет req/s, квантили задержки и число запросов
+к БД в JSON вместе с хэшем коммита.
+
+Запуск из корня репозитория:
+
+    python benchmarks/load.py --titles 2000 --reviews 50000 --requests 5000
+    python benchmarks/load.py --db /tmp/bench.sqlite3 --mix read
+    python benchmarks/load.py --compare results/old.json results/new.json
+
+С `--db` база сохраняется между прогонами и наполняется только пустой.
+Запросы идут последовательно в одном потоке: замеряется стоимость
+обработки запроса, а не параллельность сервера.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+from wsgiref.util import setup_testing_defaults
+
+from common import ROOT_DIR, git_commit, percentile, setup_django
+
+RESULTS_DIR = ROOT_DIR / "benchmarks" / "results"
+QUANTILES = (0.5, 0.95, 0.99)
+
+# сценарий: вес в смеси
+MIXES = {
+    "mixed": {
+        "titles_list": 20,
+        "titles_filter": 10,
+        "titles_top": 5,
+        "title_detail": 15,
+        "reviews_list": 15,
+        "review_detail": 5,
+        "comments_list": 10,
+        "review_create": 5,
+        "comment_create": 5,
+        "token_obtain": 10,
+    },
+    "read": {
+        "titles_list": 25,
+        "titles_filter": 15,
+        "titles_top": 5,
+        "title_detail": 20,
+        "reviews_list": 20,
+        "review_detail": 5,
+        "comments_list": 10,
+    },
+    "write": {
+        "review_create": 40,
+        "comment_create": 40,
+        "token_obtain": 20,
+    },
+}
+
+
+class WSGIClient:
+    """Вызывает WSGI-приложение проекта без сетевого сервера."""
+
+    def __init__(self):
+        from django.core.wsgi import get_wsgi_application
+
+        self.application = get_wsgi_application()
+
+    def request(self, method, path, query="", data=None, token=None):
+        body = json.dumps(data).encode() if data is not None else b""
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": "localhost",
+            "HTTP_HOST": "localhost",
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": io.BytesIO(body),
+        }
+        if token:
+            environ["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        setup_testing_defaults(environ)
+        status = []
+
+        def start_response(status_line, headers, exc_info=None):
+            status.append(int(status_line.split()[0]))
+
+        result = self.application(environ, start_response)
+        try:
+            content = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return status[0], content
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def seed(options):
+    """Наполняет базу командой generate_data, если она пуста."""
+    from django.core.management import call_command
+    from reviews.models import Title
+
+    if Title.objects.exists():
+        return
+    call_command(
+        "generate_data",
+        users=options.users,
+        titles=options.titles,
+        reviews=options.reviews,
+        comments=options.comments,
+        zipf=options.zipf,
+        batch_size=options.batch_size,
+        seed=options.seed,
+        stdout=io.StringIO(),
+    )
+
+
+class Context:
+    """Идентификаторы и токены, из которых собираются запросы."""
+
+    def __init__(self, rng):
+        from api.authentication import UserClaimsRefreshToken
+        from reviews.models import Category, Genre, Review, Title, User
+
+        self.rng = rng
+        self.title_ids = list(Title.objects.values_list("pk", flat=True))
+        self.review_pairs = self.sample(Review, ("title_id", "pk"), 5000)
+        self.genres = list(Genre.objects.values_list("slug", flat=True))
+        self.categories = list(Category.objects.values_list("slug", flat=True))
+        self.users = self.sample(User, ("username", "token"), 500)
+        reader = User.objects.create(
+            username=f"bench_reader_{time.time_ns()}",
+            email=f"reader{time.time_ns()}@yamdb.fake",
+        )
+        self.reader_token = str(
+            UserClaimsRefreshToken.for_user(reader).access_token
+        )
+        # новый автор на каждый прогон: у него ещё нет отзывов
+        self.writer = User.objects.create(
+            username=f"bench_writer_{time.time_ns()}",
+            email=f"writer{time.time_ns()}@yamdb.fake",
+        )
+        self.writer_token = str(
+            UserClaimsRefreshToken.for_user(self.writer).access_token
+        )
+        self.unreviewed = iter(self.title_ids)
+
+    def sample(self, model, fields, size):
+        """Случайные строки по id: ORDER BY RANDOM() на миллионах долог."""
+        last = model.objects.order_by("-pk").values_list("pk", flat=True)
+        last = last.first() or 0
+        ids = self.rng.sample(range(1, last + 1), min(size, last))
+        return list(model.objects.filter(pk__in=ids).values_list(*fields))
+
+    def token(self, auth_share):
+        if self.rng.random() < auth_share:
+            return self.reader_token
+        return None
+
+
+def titles_list(ctx, auth_share):
+    page = ctx.rng.choice((1, 1, 1, 2, 3))
+    return "GET", "/api/v1/titles/", f"page={page}", None, ctx.token(
+        auth_share
+    )
+
+
+def titles_filter(ctx, auth_share):
+    rng = ctx.rng
+    query = rng.choice(
+        (
+            f"genre={rng.choice(ctx.genres)}",
+            f"category={rng.choice(ctx.categories)}",
+            f"year={rng.randint(1900, datetime.now().year)}",
+            f"genre={rng.choice(ctx.genres)}&pagination=cursor",
+        )
+    )
+    return "GET", "/api/v1/titles/", query, None, ctx.token(auth_share)
+
+
+def titles_top(ctx, auth_share):
+    rng = ctx.rng
+    query = rng.choice(
+        (
+            "",
+            f"genre={rng.choice(ctx.genres)}",
+            f"category={rng.choice(ctx.categories)}",
+            "order=reviews",
+        )
+    )
+    return "GET", "/api/v1/titles/top/", query, None, ctx.token(auth_share)
+
+
+def title_detail(ctx, auth_share):
+    title_id = ctx.rng.choice(ctx.title_ids)
+    return "GET", f"/api/v1/titles/{title_id}/", "", None, ctx.token(
+        auth_share
+    )
+
+
+def reviews_list(ctx, auth_share):
+    title_id, _ = ctx.rng.choice(ctx.review_pairs)
+    return (
+        "GET",
+        f"/api/v1/titles/{title_id}/reviews/",
+        "",
+        None,
+        ctx.token(auth_share),
+    )
+
+
+def review_detail(ctx, auth_share):
+    title_id, review_id = ctx.rng.choice(ctx.review_pairs)
+    return (
+        "GET",
+        f"/api/v1/titles/{title_id}/reviews/{review_id}/",
+        "",
+        None,
+        ctx.token(auth_share),
+    )
+
+
+def comments_list(ctx, auth_share):
+    title_id, review_id = ctx.rng.choice(ctx.review_pairs)
+    return (
+        "GET",
+        f"/api/v1/titles/{title_id}/reviews/{review_id}/comments/",
+        "",
+        None,
+        ctx.token(auth_share),
+    )
+
+
+def review_create(ctx, auth_share):
+    return (
+        "POST",
+        f"/api/v1/titles/{next(ctx.unreviewed)}/reviews/",
+        "",
+        {"text": "Нагрузочный отзыв", "score": ctx.rng.randint(1, 10)},
+        ctx.writer_token,
+    )
+
+
+def comment_create(ctx, auth_share):
+    title_id, review_id = ctx.rng.choice(ctx.review_pairs)
+    return (
+        "POST",
+        f"/api/v1/titles/{title_id}/reviews/{review_id}/comments/",
+        "",
+        {"text": "Нагрузочный комментарий"},
+        ctx.writer_token,
+    )
+
+
+def token_obtain(ctx, auth_share):
+    username, token = ctx.rng.choice(ctx.users)
+    return (
+        "POST",
+        "/api/v1/auth/token/",
+        "",
+        {"username": username, "confirmation_code": token},
+        None,
+    )
+
+
+REQUEST_BUILDERS = {
+    builder.__name__: builder
+    for builder in (
+        titles_list,
+        titles_filter,
+        titles_top,
+        title_detail,
+        reviews_list,
+        review_detail,
+        comments_list,
+        review_create,
+        comment_create,
+        token_obtain,
+    )
+}
+
+
+def build_request(name, ctx, auth_share):
+    """Возвращает (method, path, query, data, token) для сценария."""
+    if name not in REQUEST_BUILDERS:
+        raise ValueError(f"Неизвестный сценарий {name}")
+    return REQUEST_BUILDERS[name](ctx, auth_share)
+
+
+def summarize(latencies, queries, errors, elapsed=None):
+    result = {
+        "requests": len(latencies),
+        "errors": errors,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        **{
+            f"p{int(q * 100)}_ms": percentile(latencies, q) * 1000
+            for q in QUANTILES
+        },
+        "queries_per_request": sum(queries) / len(queries),
+    }
+    if elapsed is not None:
+        result["rps"] = len(latencies) / elapsed
+    return result
+
+
+def run(options):
+    from django.conf import settings
+    from django.db import connections
+
+    settings.API_CACHE_ENABLED = not options.no_cache
+    rng = random.Random(options.seed)
+    ctx = Context(rng)
+    client = WSGIClient()
+    mix = MIXES[options.mix]
+    names = rng.choices(
+        list(mix),
+        weights=list(mix.values()),
+        k=options.warmup + options.requests,
+    )
+    if names.count("review_create") > len(ctx.title_ids):
+        sys.exit("Мало произведений для сценария review_create.")
+    latencies = defaultdict(list)
+    queries = defaultdict(list)
+    errors = defaultdict(int)
+    started = None
+    for number, name in enumerate(names):
+        if number == options.warmup:
+            started = time.perf_counter()
+        method, path, query, data, token = build_request(
+            name, ctx, options.auth_share
+        )
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            request_started = time.perf_counter()
+            status, _ = client.request(method, path, query, data, token)
+            latency = time.perf_counter() - request_started
+        if number < options.warmup:
+            continue
+        latencies[name].append(latency)
+        queries[name].append(counter.count)
+        if status >= 400:
+            errors[name] += 1
+    elapsed = time.perf_counter() - started
+    all_latencies = [value for rows in latencies.values() for value in rows]
+    all_queries = [value for rows in queries.values() for value in rows]
+    return {
+        "total": summarize(
+            all_latencies, all_queries, sum(errors.values()), elapsed
+        ),
+        "scenarios": {
+            name: summarize(latencies[name], queries[name], errors[name])
+            for name in sorted(latencies)
+        },
+    }
+
+
+def dataset_sizes():
+    from reviews.models import Comment, Review, Title, User
+
+    return {
+        model._meta.model_name: model.objects.count()
+        for model in (User, Title, Review, Comment)
+    }
+
+
+def print_results(results):
+    total = results["total"]
+    print(
+        f"{'сценарий':<16}{'запросов':>9}{'ошибок':>8}{'p50 мс':>9}"
+        f"{'p95 мс':>9}{'p99 мс':>9}{'SQL/запр':>10}"
+    )
+    for name, row in [*results["scenarios"].items(), ("всего", total)]:
+        print(
+            f"{name:<16}{row['requests']:>9}{row['errors']:>8}"
+            f"{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+            f"{row['p99_ms']:>9.2f}{row['queries_per_request']:>10.2f}"
+        )
+    print(f"req/s: {total['rps']:.1f}")
+
+
+def compare(old_path, new_path):
+    old, new = (
+        json.loads(Path(path).read_text()) for path in (old_path, new_path)
+    )
+    print(
+        f"{(old['commit'] or '?')[:8]} -> {(new['commit'] or '?')[:8]}\n"
+        f"{'сценарий':<16}{'p95 было':>10}{'p95 стало':>11}{'SQL было':>10}"
+        f"{'SQL стало':>11}"
+    )
+    names = sorted(set(old["scenarios"]) | set(new["scenarios"]))
+    for name in names:
+        before = old["scenarios"].get(name)
+        after = new["scenarios"].get(name)
+        if not before or not after:
+            continue
+        print(
+            f"{name:<16}{before['p95_ms']:>10.2f}{after['p95_ms']:>11.2f}"
+            f"{before['queries_per_request']:>10.2f}"
+            f"{after['queries_per_request']:>11.2f}"
+        )
+    print(
+        f"req/s: {old['total']['rps']:.1f} -> {new['total']['rps']:.1f} "
+        f"({(new['total']['rps'] / old['total']['rps'] - 1) * 100:+.1f}%)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--db", help="Файл SQLite, сохраняемый между прогонами."
+    )
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--titles", type=int, default=2000)
+    parser.add_argument("--reviews", type=int, default=20000)
+    parser.add_argument("--comments", type=int, default=20000)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument(
+        "--auth-share",
+        type=float,
+        default=0.3,
+        help="Доля GET-запросов с токеном (они не попадают в кэш ответов).",
+    )
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Куда сохранить JSON с результатами.")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    options = parser.parse_args()
+
+    if options.compare:
+        compare(*options.compare)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(options.db or os.path.join(directory, "load.sqlite3"))
+        started = time.perf_counter()
+        seed(options)
+        print(f"данные готовы за {time.perf_counter() - started:.1f} с")
+        sizes = dataset_sizes()
+        results = run(options)
+
+    print_results(results)
+    commit = git_commit()
+    report = {
+        **commit,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "dataset": sizes,
+        "options": {
+            key: value
+            for key, value in vars(options).items()
+            if key not in ("compare", "output")
+        },
+        **results,
+    }
+    output = Path(
+        options.output
+        or RESULTS_DIR
+        / "{}-{}.json".format(
+            datetime.now().strftime("%Y%m%d-%H%M%S"),
+            (commit["commit"] or "nogit")[:8],
+        )
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"результаты: {output}")
+
+
+if __name__ == "__main__":
+    main()
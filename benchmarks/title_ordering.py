@@ -0,0 +1,104 @@
+"""Задержка `/api/v1/titles/?ordering=` в зависимости от размера каталога.
+
+Запуск из корня репозитория:
+
+    python benchmarks/title_ordering.py --sizes 1000 10000 100000
+
+Каталог наращивается командой generate_data до каждого размера, после
+чего каждая сортировка запрашивается --requests раз с выключенным кэшем
+ответов. Если сортировка идёт по индексу, медиана не растёт вместе с
+каталогом; растёт только COUNT(*) постраничной пагинации.
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from common import percentile, setup_django
+from load import WSGIClient
+
+ORDERINGS = (
+    "",
+    "rating",
+    "-rating",
+    "year",
+    "-year",
+    "name",
+    "-name",
+    "reviews_count",
+    "-reviews_count",
+)
+
+
+def grow(size, options):
+    """Добавляет произведения с отзывами до size штук."""
+    from django.core.management import call_command
+    from reviews.models import Title
+
+    missing = size - Title.objects.count()
+    if missing <= 0:
+        return
+    call_command(
+        "generate_data",
+        users=options.users,
+        titles=missing,
+        reviews=missing * options.reviews_per_title,
+        comments=0,
+        batch_size=5000,
+        seed=size,
+        stdout=io.StringIO(),
+    )
+
+
+def measure(client, ordering, requests):
+    query = f"ordering={ordering}" if ordering else ""
+    timings = []
+    for _ in range(requests + 1):
+        started = time.perf_counter()
+        status, _ = client.request("GET", "/api/v1/titles/", query)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert status == 200, status
+    # первый запрос прогревает кэш страниц SQLite
+    return percentile(timings[1:], 0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    parser.add_argument("--reviews-per-title", type=int, default=5)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument(
+        "--db", help="Файл SQLite, сохраняемый между прогонами."
+    )
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(options.db or os.path.join(directory, "order.sqlite3"))
+        from django.conf import settings
+
+        settings.API_CACHE_ENABLED = False
+        client = WSGIClient()
+        results = {}
+        for size in sorted(options.sizes):
+            grow(size, options)
+            for ordering in ORDERINGS:
+                results[ordering, size] = measure(
+                    client, ordering, options.requests
+                )
+
+    sizes = sorted(options.sizes)
+    print("p50, мс")
+    print(f"{'ordering':<16}" + "".join(f"{size:>10}" for size in sizes))
+    for ordering in ORDERINGS:
+        print(
+            f"{ordering or '(по умолчанию)':<16}"
+            + "".join(f"{results[ordering, size]:>10.2f}" for size in sizes)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache, caches
+
+    cache.clear()
+    caches['local'].clear()
+    yield
+    cache.clear()
+    caches['local'].clear()
+
+
+@pytest.fixture(autouse=True)
+def shared_cache(settings):
+    # Тесты идут в одном процессе, а число запросов к БД проверяется без
+    # обращений к таблице общего кэша: в тестах он хранится в памяти.
+    settings.CACHES = {
+        **settings.CACHES,
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'shared',
+        },
+    }
+    from django.core.cache import caches
+
+    caches['shared'].clear()
+    yield caches['shared']
+    caches['shared'].clear()
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def inspect_queries(request, settings):
+    settings.QUERY_INSPECTION_ENABLED = True
+    settings.NPLUSONE_RAISE = request.node.get_closest_marker('allow_nplusone') is None
@@ -0,0 +1,54 @@
+import pytest
+from django.core.management import call_command
+
+from .common import create_reviews
+
+
+class Test08TitleRating:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_follows_review_changes(self, admin_client, admin):
+        from reviews.models import Review, Title
+
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.reviews_count, title.rating) == (12, 3, 4.0), (
+            'Проверьте, что при создании отзыва обновляются сумма оценок, '
+            'количество отзывов и рейтинг произведения'
+        )
+
+        review = Review.objects.get(pk=reviews[0]['id'])
+        review.score = 8
+        review.save()
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count, title.rating) == (15, 3, 5.0), (
+            'Проверьте, что при изменении оценки отзыва пересчитывается рейтинг произведения'
+        )
+
+        Review.objects.filter(pk__in=[reviews[1]['id'], reviews[2]['id']]).delete()
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count, title.rating) == (8, 1, 8.0), (
+            'Проверьте, что при удалении отзывов пересчитывается рейтинг произведения'
+        )
+
+        review.delete()
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count, title.rating) == (0, 0, None), (
+            'Проверьте, что у произведения без отзывов рейтинг равен `None`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recalculate_ratings_command(self, admin_client, admin):
+        from reviews.models import Title
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(score_sum=0, reviews_count=0, rating=None)
+        call_command('recalculate_ratings', batch_size=1)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.reviews_count, title.rating) == (12, 3, 4.0), (
+            'Проверьте, что команда `recalculate_ratings` пересчитывает рейтинг по отзывам'
+        )
+        title = Title.objects.get(pk=titles[1]['id'])
+        assert (title.score_sum, title.reviews_count, title.rating) == (0, 0, None), (
+            'Проверьте, что команда `recalculate_ratings` обнуляет рейтинг произведений без отзывов'
+        )
@@ -0,0 +1,161 @@
+import pytest
+from rest_framework.test import APIClient
+
+from .common import create_titles
+
+
+def create_more_titles(count):
+    from reviews.models import Category, Genre, Title
+
+    category = Category.objects.first()
+    genres = list(Genre.objects.all())
+    for number in range(count):
+        title = Title.objects.create(
+            name=f'Произведение {number}', year=2000, category=category
+        )
+        title.genre.set(genres)
+
+
+class Test09QueryCount:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_list_queries(self, client, admin_client,
+                                    django_assert_num_queries):
+        create_titles(admin_client)
+        # COUNT для пагинации, выборка страницы с категориями, жанры страницы
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert len(response.json()['results']) == 2
+
+        create_more_titles(13)
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert len(response.json()['results']) == 15, (
+            'Проверьте, что количество запросов к БД при GET запросе `/api/v1/titles/` '
+            'не зависит от размера страницы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_detail_queries(self, client, admin_client,
+                                     django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert len(response.json()['genre']) == 2, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/` '
+            'жанры загружаются одним запросом'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_titles_cursor_pagination(self, client, admin_client,
+                                         django_assert_num_queries):
+        create_titles(admin_client)
+        create_more_titles(15)
+        # выборка страницы без COUNT и жанры страницы
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/titles/?pagination=cursor')
+        first_page = response.json()
+        assert 'count' not in first_page and first_page['next'], (
+            'Проверьте, что при GET запросе `/api/v1/titles/?pagination=cursor` '
+            'возвращается курсорная пагинация'
+        )
+        with django_assert_num_queries(2):
+            response = client.get(first_page['next'])
+        second_page = response.json()
+        first_ids = [title['id'] for title in first_page['results']]
+        second_ids = [title['id'] for title in second_page['results']]
+        assert len(first_ids) == 15 and len(second_ids) == 2
+        assert max(second_ids) < min(first_ids), (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` '
+            'упорядочена по убыванию `id` и страницы не пересекаются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_nested_parent_resolved_once(self, client, admin_client, admin,
+                                            django_assert_num_queries):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        titles, _, _ = create_titles(admin_client)
+        token = client.post(
+            '/api/v1/auth/token/',
+            data={'username': admin.username, 'confirmation_code': admin.token}
+        ).json()['token']
+        api_client = APIClient()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.post(url, data={'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 201
+        title_queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "reviews_title"' in query['sql']
+        ]
+        assert len(title_queries) == 1, (
+            'Проверьте, что при POST запросе `/api/v1/titles/{title_id}/reviews/` '
+            'произведение загружается из БД только один раз'
+        )
+        review_id = response.json()['id']
+
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{review_id}/comments/'
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.post(url, data={'text': 'Комментарий'})
+        assert response.status_code == 201
+        review_queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "reviews_review"' in query['sql']
+        ]
+        assert len(review_queries) == 1, (
+            'Проверьте, что при POST запросе комментария отзыв загружается из БД только один раз'
+        )
+
+        other_title_url = f'/api/v1/titles/{titles[1]["id"]}/reviews/{review_id}/'
+        assert client.get(other_title_url).status_code == 404
+        assert client.get(f'{other_title_url}comments/').status_code == 404, (
+            'Проверьте, что комментарии отзыва недоступны по адресу чужого произведения'
+        )
+        assert api_client.post(f'{other_title_url}comments/', data={'text': 'x'}).status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_review_and_comment_pages_join_authors(self, client, admin_client,
+                                                      django_assert_num_queries):
+        from reviews.models import Comment, Review, Title, User
+
+        create_titles(admin_client)
+        title = Title.objects.first()
+        authors = [
+            User.objects.create(username=f'author{number}', email=f'author{number}@yamdb.fake')
+            for number in range(16)
+        ]
+        for author in authors:
+            Review.objects.create(title=title, author=author, text='Отзыв', score=5)
+        review = Review.objects.first()
+        for author in authors:
+            Comment.objects.create(review=review, author=author, text='Комментарий')
+
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        # проверка произведения, COUNT и страница вместе с авторами
+        with django_assert_num_queries(3):
+            response = client.get(url)
+        results = response.json()['results']
+        assert len(results) == 15 and results[0]['author'] == 'author15', (
+            'Проверьте, что авторы отзывов загружаются одним запросом вместе со страницей'
+        )
+
+        with django_assert_num_queries(3):
+            response = client.get(f'{url}{review.id}/comments/')
+        results = response.json()['results']
+        assert len(results) == 15 and results[0]['author'] == 'author15', (
+            'Проверьте, что авторы комментариев загружаются одним запросом вместе со страницей'
+        )
+
+        with django_assert_num_queries(1):
+            response = client.get(f'{url}{review.id}/')
+        assert response.json()['author'] == 'author0'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_hot_paths_use_indexes(self):
+        from django.core.management import call_command
+
+        call_command('explain_queries')
@@ -0,0 +1,102 @@
+from smtplib import SMTPException
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+
+
+class Test10OutgoingMail:
+    url_signup = '/api/v1/auth/signup/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_queues_confirmation_mail(self, client):
+        from reviews.models import OutgoingMail, User
+
+        outbox_before_count = len(mail.outbox)
+        data = {'email': 'queued@yamdb.fake', 'username': 'queued'}
+        response = client.post(self.url_signup, data=data)
+        assert response.status_code == 200
+        assert len(mail.outbox) == outbox_before_count, (
+            f'Проверьте, что при POST запросе `{self.url_signup}` письмо '
+            'ставится в очередь, а не отправляется во время запроса'
+        )
+        queued = OutgoingMail.objects.get(recipient=data['email'])
+        user = User.objects.get(username=data['username'])
+        assert user.token in queued.body, (
+            'Проверьте, что в письме из очереди есть код подтверждения'
+        )
+
+        call_command('send_outgoing_mail')
+        assert len(mail.outbox) == outbox_before_count + 1
+        assert mail.outbox[-1].to == [data['email']]
+        queued.refresh_from_db()
+        assert queued.sent_at is not None, (
+            'Проверьте, что отправленное письмо помечается в очереди'
+        )
+
+        call_command('send_outgoing_mail')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_failed_mail_is_retried_with_backoff(self):
+        from reviews.models import OutgoingMail
+
+        queued = OutgoingMail.objects.create(
+            subject='Тема', body='Текст', from_email='admin@admin.oi',
+            recipient='retry@yamdb.fake'
+        )
+        with mock.patch(
+            'django.core.mail.EmailMessage.send', side_effect=SMTPException
+        ):
+            call_command('send_outgoing_mail', backoff=60)
+        queued.refresh_from_db()
+        assert queued.sent_at is None and queued.attempts == 1, (
+            'Проверьте, что при ошибке отправки увеличивается счетчик попыток'
+        )
+        assert queued.send_after > queued.created, (
+            'Проверьте, что повторная отправка откладывается'
+        )
+        assert 'SMTPException' in queued.last_error
+
+        call_command('send_outgoing_mail')
+        queued.refresh_from_db()
+        assert queued.sent_at is None, (
+            'Проверьте, что письмо не отправляется раньше `send_after`'
+        )
+
+        OutgoingMail.objects.update(send_after=queued.created)
+        outbox_before_count = len(mail.outbox)
+        call_command('send_outgoing_mail')
+        queued.refresh_from_db()
+        assert queued.sent_at is not None
+        assert len(mail.outbox) == outbox_before_count + 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_claimed_mail_is_sent_once(self):
+        from reviews.models import OutgoingMail
+
+        queued = OutgoingMail.objects.create(
+            subject='Тема', body='Текст', from_email='admin@admin.oi',
+            recipient='claimed@yamdb.fake'
+        )
+        # пачку уже забрал другой обработчик
+        assert OutgoingMail.objects.claim(5, 100, 60) == [queued]
+        assert OutgoingMail.objects.claim(5, 100, 60) == [], (
+            'Проверьте, что закрепленное письмо не выдается второму обработчику'
+        )
+        outbox_before_count = len(mail.outbox)
+        call_command('send_outgoing_mail')
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что `send_outgoing_mail` не отправляет письма, '
+            'закрепленные за другим обработчиком'
+        )
+
+        # обработчик упал, не отправив письмо: аренда истекла
+        OutgoingMail.objects.update(send_after=queued.created)
+        call_command('send_outgoing_mail')
+        queued.refresh_from_db()
+        assert queued.sent_at is not None
+        assert len(mail.outbox) == outbox_before_count + 1
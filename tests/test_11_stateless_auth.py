@@ -0,0 +1,99 @@
+import pytest
+from rest_framework.test import APIClient, APIRequestFactory
+
+
+def obtain_token(client, user):
+    response = client.post(
+        '/api/v1/auth/token/',
+        data={'username': user.username, 'confirmation_code': user.token}
+    )
+    assert response.status_code == 200
+    return response.json()['token']
+
+
+class Test11StatelessAuth:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_token_user_without_db_queries(self, client, admin, settings,
+                                              django_assert_num_queries):
+        from api.authentication import StatelessJWTAuthentication
+
+        # общий кэш как в рабочих настройках: таблица в основной базе
+        settings.CACHES = {
+            **settings.CACHES,
+            'shared': {
+                'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                'LOCATION': 'api_shared_cache',
+            },
+        }
+        token = obtain_token(client, admin)
+        request = APIRequestFactory().get(
+            '/api/v1/titles/', HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        # первая проверка отзыва читает общий кэш, дальше — память процесса
+        StatelessJWTAuthentication().authenticate(request)
+        with django_assert_num_queries(0):
+            user, _ = StatelessJWTAuthentication().authenticate(request)
+        assert (user.id, user.username, user.role, user.is_superuser) == (
+            admin.id, admin.username, 'admin', False
+        ), 'Проверьте, что роль и имя пользователя передаются в claims токена'
+
+        api_client = APIClient()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = api_client.post(
+            '/api/v1/genres/', data={'name': 'Ужасы', 'slug': 'horror'}
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что администратор с токеном из `/api/v1/auth/token/` '
+            'может добавить жанр'
+        )
+        response = api_client.get('/api/v1/users/me/')
+        assert response.json()['username'] == admin.username
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_role_change_revokes_token(self, client, admin):
+        token = obtain_token(client, admin)
+        api_client = APIClient()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        admin.bio = 'Новое описание'
+        admin.save()
+        response = api_client.get('/api/v1/users/')
+        assert response.status_code == 200, (
+            'Проверьте, что изменение профиля не отзывает токен'
+        )
+
+        admin.role = 'user'
+        admin.save()
+        response = api_client.get('/api/v1/users/')
+        assert response.status_code == 401, (
+            'Проверьте, что после смены роли старый токен перестает действовать'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_revocation_precision_and_storage(self, client, admin):
+        from django.core.cache import cache, caches
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from api.authentication import ISSUED_AT_CLAIM, REVOCATION_KEY
+
+        token = obtain_token(client, admin)
+        issued_at = AccessToken(token)[ISSUED_AT_CLAIM]
+        api_client = APIClient()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        key = REVOCATION_KEY.format(admin.id)
+
+        # отзыв в ту же секунду, но раньше выдачи токена
+        caches['shared'].set(key, issued_at - 1)
+        assert api_client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что токен, выданный сразу после отзыва, действует'
+        )
+        # отзыв другим процессом: этот процесс увидит его, когда истечет
+        # копия в памяти
+        caches['shared'].set(key, issued_at + 1)
+        cache.clear()
+        assert api_client.get('/api/v1/users/').status_code == 200
+        caches['local'].clear()
+        assert api_client.get('/api/v1/users/').status_code == 401, (
+            'Проверьте, что отзыв хранится в общем кэше, а не в памяти процесса'
+        )
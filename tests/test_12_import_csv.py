@@ -0,0 +1,79 @@
+import pytest
+from django.core.management import call_command
+
+
+class Test12ImportCSV:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_static_data(self):
+        from reviews.models import Comment, Review, Title, User
+
+        call_command('import_csv', batch_size=10)
+        assert Title.objects.count() == 32
+        assert Title.genre.through.objects.count() == 42
+        assert Review.objects.count() == 72, (
+            'Проверьте, что команда `import_csv` загружает многострочные отзывы'
+        )
+        assert Comment.objects.count() == 3
+
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что команда `import_csv` сохраняет даты публикации из файла'
+        )
+        assert all(User.objects.values_list('token', flat=True)), (
+            'Проверьте, что команда `import_csv` выдает пользователям токены'
+        )
+        title = Title.objects.get(pk=1)
+        assert (title.reviews_count, title.rating) == (2, 10.0), (
+            'Проверьте, что после загрузки отзывов пересчитывается рейтинг'
+        )
+        assert Review._meta.get_field('pub_date').auto_now_add is False
+
+        author = User.objects.create(username='fresh', email='fresh@yamdb.fake')
+        review = Review.objects.create(title=title, author=author, text='x', score=5)
+        assert review.pub_date.year > 2019, (
+            'Проверьте, что дата публикации нового отзыва заполняется автоматически'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_export_round_trip(self, tmp_path):
+        import csv
+        import os
+
+        from reviews.datasets import DATA_DIR
+        from reviews.models import Review
+
+        call_command('import_csv')
+        call_command('export_data', path=str(tmp_path), chunk_size=7)
+        for name in ('category', 'genre', 'genre_title', 'review', 'comments'):
+            with open(os.path.join(DATA_DIR, f'{name}.csv'), encoding='utf-8', newline='') as file:
+                expected = list(csv.reader(file))
+            with open(tmp_path / f'{name}.csv', encoding='utf-8', newline='') as file:
+                exported = list(csv.reader(file))
+            assert exported[0] == expected[0], (
+                f'Проверьте, что выгрузка `{name}.csv` повторяет столбцы static/data'
+            )
+            assert len(exported) == len(expected)
+
+        Review.objects.all().delete()
+        call_command('import_csv', path=str(tmp_path), only=['review'])
+        assert Review.objects.count() == 72, (
+            'Проверьте, что выгрузку можно загрузить обратно командой `import_csv`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_export_endpoint(self, admin_client, user_client):
+        import json
+
+        call_command('import_csv', only=['users', 'category', 'genre', 'titles'])
+        url = '/api/v1/export/titles.ndjson'
+        response = user_client.get(url)
+        assert response.status_code == 403, (
+            f'Проверьте, что `{url}` доступен только администратору'
+        )
+        response = admin_client.get(url)
+        assert response.status_code == 200 and response.streaming
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        assert len(rows) == 32
+        assert set(rows[0]) == {'id', 'name', 'year', 'description', 'category', 'rating'}
+        assert admin_client.get('/api/v1/export/users.csv').status_code == 404
@@ -0,0 +1,121 @@
+import pytest
+
+from .common import create_reviews, create_titles
+
+
+class Test13ResponseCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_anonymous_responses_are_cached(self, client, admin_client,
+                                               django_assert_num_queries):
+        from api.cache import cache_stats
+
+        create_titles(admin_client)
+        response = client.get('/api/v1/titles/', {'year': 2000, 'genre': 'horror'})
+        assert response['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            cached = client.get('/api/v1/titles/', {'genre': 'horror', 'year': 2000})
+        assert cached['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный анонимный GET запрос `/api/v1/titles/` '
+            'отдается из кэша независимо от порядка параметров'
+        )
+        assert cached.json() == response.json()
+        assert cached['Content-Type'] == response['Content-Type']
+        assert cache_stats()[('TitleViewSet', 'hit')] >= 1
+
+        response = admin_client.get('/api/v1/titles/')
+        assert 'X-Cache' not in response, (
+            'Проверьте, что запросы с токеном не кэшируются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_cache_is_invalidated_by_signals(self, client, admin_client, admin):
+        from reviews.models import Genre, Title
+
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url)['X-Cache'] == 'MISS'
+        assert client.get(url)['X-Cache'] == 'HIT'
+
+        admin_client.patch(
+            f'{url}reviews/{reviews[0]["id"]}/', data={'score': 8}
+        )
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS' and response.json()['rating'] == 5, (
+            'Проверьте, что изменение отзыва сбрасывает кэш произведения'
+        )
+
+        title = Title.objects.get(pk=titles[0]['id'])
+        title.genre.remove(Genre.objects.get(slug='horror'))
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что изменение жанров произведения сбрасывает кэш'
+        )
+        assert [genre['slug'] for genre in response.json()['genre']] == ['comedy']
+
+        reviews_url = f'{url}reviews/'
+        assert client.get(reviews_url)['X-Cache'] == 'MISS'
+        admin.username = 'RenamedAdmin'
+        admin.save()
+        response = client.get(reviews_url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что изменение автора сбрасывает кэш отзывов'
+        )
+        assert 'RenamedAdmin' in [review['author'] for review in response.json()['results']]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_stamps_move_after_commit(self, client, admin_client, shared_cache):
+        from django.core.cache import cache
+        from django.db import transaction
+
+        from api.cache import stamp_key
+        from reviews.models import Genre, Title
+
+        create_titles(admin_client)
+        url = '/api/v1/titles/'
+        assert client.get(url)['X-Cache'] == 'MISS'
+        stamp = shared_cache.get(stamp_key(Title))
+        assert stamp is not None and cache.get(stamp_key(Title)) is None, (
+            'Проверьте, что отметки изменений хранятся в общем кэше'
+        )
+
+        with transaction.atomic():
+            title = Title.objects.first()
+            title.name = 'Новое название'
+            title.save()
+            title.genre.remove(Genre.objects.get(slug='horror'))
+            assert shared_cache.get(stamp_key(Title)) == stamp
+            assert client.get(url)['X-Cache'] == 'HIT', (
+                'Проверьте, что отметка не сдвигается до фиксации транзакции'
+            )
+        assert shared_cache.get(stamp_key(Title)) > stamp
+        assert client.get(url)['X-Cache'] == 'MISS'
+
+        stamp = shared_cache.get(stamp_key(Title))
+        with transaction.atomic():
+            Title.objects.first().genre.clear()
+            transaction.set_rollback(True)
+        assert shared_cache.get(stamp_key(Title)) == stamp
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_cache_follows_content_negotiation(self, client, admin_client):
+        admin_client.post('/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'})
+        url = '/api/v1/categories/'
+
+        response = client.get(url, HTTP_ACCEPT='text/html')
+        assert response['X-Cache'] == 'MISS'
+        assert response['Content-Type'].startswith('text/html')
+
+        response = client.get(url, HTTP_ACCEPT='application/json')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что ответ для браузера не отдается из кэша на запрос JSON'
+        )
+        assert response['Content-Type'] == 'application/json'
+        assert response.json()['results'] == [{'name': 'Фильм', 'slug': 'films'}]
+
+        response = client.get(url, HTTP_ACCEPT='application/json')
+        assert response['X-Cache'] == 'HIT'
+        assert response['Content-Type'] == 'application/json'
+        response = client.get(url, HTTP_ACCEPT='text/html')
+        assert response['X-Cache'] == 'HIT'
+        assert response['Content-Type'].startswith('text/html')
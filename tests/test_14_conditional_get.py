@@ -0,0 +1,143 @@
+import pytest
+from rest_framework.test import APIClient
+
+from .common import create_comments
+
+
+class Test14ConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_not_modified(self, client, admin_client, admin,
+                             django_assert_num_queries):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        urls = [
+            '/api/v1/titles/',
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/',
+        ]
+        for url in urls:
+            response = admin_client.get(url)
+            etag = response['ETag']
+            assert etag and response.has_header('Last-Modified'), (
+                f'Проверьте, что GET запрос `{url}` возвращает ETag и Last-Modified'
+            )
+            # только запрос валидаторов, без выборки и сериализации
+            with django_assert_num_queries(1):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 304, (
+                f'Проверьте, что GET запрос `{url}` с совпадающим If-None-Match '
+                'возвращает 304 по одному запросу валидаторов'
+            )
+            assert response['ETag'] == etag and response.has_header('Last-Modified'), (
+                'Проверьте, что ответ 304 содержит ETag и Last-Modified'
+            )
+
+        url = urls[3]
+        etag = client.get(url)['ETag']
+        admin_client.patch(f'{url}{comments[0]["id"]}/', data={'text': 'Новый текст'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, (
+            'Проверьте, что после изменения комментария ETag меняется'
+        )
+        assert 'Новый текст' in [comment['text'] for comment in response.json()['results']]
+
+        last_modified = response['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['X-Cache'] == 'HIT'
+        etag = response['ETag']
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что закэшированный ответ сравнивается с If-None-Match '
+            'без запросов к БД'
+        )
+        assert response['ETag'] == etag and response['Last-Modified'] == last_modified
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_validators_are_per_resource(self, client, admin_client, admin):
+        from reviews.models import Genre, Review, User
+
+        comments, reviews, titles, user, _ = create_comments(admin_client, admin)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        reviews_url = f'{title_url}reviews/'
+        other_url = f'/api/v1/titles/{titles[1]["id"]}/'
+        etags = {url: client.get(url)['ETag'] for url in (title_url, reviews_url)}
+
+        admin_client.post(f'{other_url}reviews/', data={'text': 'Отзыв', 'score': 9})
+        for url, etag in etags.items():
+            assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304, (
+                'Проверьте, что отзыв на другое произведение не меняет ETag '
+                f'ответа `{url}`'
+            )
+
+        other_etag = client.get(other_url)['ETag']
+        Review.objects.create(
+            title_id=titles[0]['id'], text='Ещё отзыв', score=1,
+            author=User.objects.create(username='reader', email='reader@yamdb.fake'),
+        )
+        assert client.get(title_url, HTTP_IF_NONE_MATCH=etags[title_url]).status_code == 200, (
+            'Проверьте, что новый отзыв меняет ETag произведения: меняется рейтинг'
+        )
+        assert client.get(other_url, HTTP_IF_NONE_MATCH=other_etag).status_code == 304
+
+        etag = client.get(reviews_url)['ETag']
+        User.objects.filter(pk=user.pk).get().save()
+        assert client.get(reviews_url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        renamed = User.objects.get(pk=user.pk)
+        renamed.first_name = 'Новое имя'
+        renamed.save()
+        assert client.get(reviews_url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+            'Проверьте, что изменение профиля автора меняет ETag его отзывов'
+        )
+
+        etag = client.get(other_url)['ETag']
+        genre = Genre.objects.get(slug='drama')
+        genre.name = 'Трагедия'
+        genre.save()
+        response = client.get(other_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что переименование жанра меняет ETag его произведений'
+        )
+        etag = response['ETag']
+        Genre.objects.get(slug='drama').title_set.clear()
+        assert client.get(other_url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_validators_follow_authentication(self, client, admin_client, admin):
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+
+        invalid_client = APIClient()
+        invalid_client.credentials(HTTP_AUTHORIZATION='Bearer invalid')
+        response = invalid_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 401, (
+            'Проверьте, что 304 возвращается только после аутентификации'
+        )
+        response = client.get(f'/api/v1/titles/{titles[0]["id"] + 100}/reviews/',
+                              HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_cursor_pages(self, admin_client, admin):
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        last_modified = admin_client.get(url)['Last-Modified']
+
+        response = admin_client.get(url, {'pagination': 'cursor'})
+        assert response.status_code == 200 and not response.has_header('ETag'), (
+            'Проверьте, что курсорная страница без условных заголовков '
+            'не тратит запрос на валидаторы'
+        )
+        response = admin_client.get(
+            url, {'pagination': 'cursor'}, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        assert response.status_code == 304, (
+            'Проверьте, что курсорная страница отвечает 304 на условный запрос'
+        )
+        assert response['Last-Modified'] == last_modified
@@ -0,0 +1,86 @@
+import pytest
+
+from .common import create_reviews
+
+
+class Test15TitleSearch:
+
+    def search(self, client, query):
+        response = client.get('/api/v1/titles/', {'search': query})
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search_titles(self, client, admin_client, admin):
+        from reviews.models import Title
+
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        assert self.search(client, 'поворот') == ['Поворот туда'], (
+            'Проверьте, что параметр `search` ищет по названию произведения без учета регистра'
+        )
+        assert self.search(client, 'драм') == ['Проект'], (
+            'Проверьте, что параметр `search` ищет по описанию и по началу слова'
+        )
+        assert self.search(client, 'qwerty321') == ['Поворот туда'], (
+            'Проверьте, что параметр `search` ищет по текстам отзывов'
+        )
+
+        Title.objects.filter(pk=titles[1]['id']).update(description='')
+        title = Title.objects.get(pk=titles[1]['id'])
+        title.description = 'Проект про поворот сюжета'
+        title.save()
+        assert self.search(client, 'поворот') == ['Поворот туда', 'Проект'], (
+            'Проверьте, что совпадения в названии ранжируются выше совпадений в описании'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/',
+            data={'text': 'Неожиданный финал'}
+        )
+        assert self.search(client, 'неожиданный') == ['Поворот туда'], (
+            'Проверьте, что поисковый индекс обновляется при изменении отзыва'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert self.search(client, 'поворот') == ['Проект']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_like_backend(self, client, admin_client, admin, settings):
+        settings.SEARCH_BACKEND = 'reviews.search.LikeSearchBackend'
+        create_reviews(admin_client, admin)
+        assert self.search(client, 'qwerty321') == ['Поворот туда']
+        assert self.search(client, 'Проект драма') == ['Проект']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_review_writes_touch_only_their_row(self, client, admin_client, admin):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from reviews.models import Review, User
+
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        assert self.search(client, 'поворот qwerty321') == ['Поворот туда'], (
+            'Проверьте, что слова ищутся и в произведении, и в его отзывах'
+        )
+
+        author = User.objects.create(username='reader', email='reader@yamdb.fake')
+        with CaptureQueriesContext(connection) as context:
+            review = Review.objects.create(
+                title_id=titles[0]['id'], author=author, text='Сюжетный твист', score=7
+            )
+        search_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'search' in query['sql']
+        ]
+        assert len(search_queries) == 2 and not any(
+            'reviews_title_search' in sql or 'group_concat' in sql
+            for sql in search_queries
+        ), (
+            'Проверьте, что запись отзыва переиндексирует только строку этого отзыва'
+        )
+        assert self.search(client, 'твист') == ['Поворот туда']
+
+        review.title_id = titles[1]['id']
+        review.save()
+        assert self.search(client, 'твист') == ['Проект']
+        review.delete()
+        assert self.search(client, 'твист') == []
@@ -0,0 +1,71 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test16TitleFacets:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_facet_counts(self, client, admin_client,
+                             django_assert_num_queries):
+        create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Третий', 'year': 2000, 'genre': ['drama', 'comedy'],
+            'category': 'films', 'description': 'Ещё одна драма'
+        })
+
+        response = client.get('/api/v1/titles/')
+        assert 'facets' not in response.json(), (
+            'Проверьте, что счетчики фасетов возвращаются только по запросу'
+        )
+
+        # COUNT, страница, жанры страницы и по одному запросу на фасет
+        with django_assert_num_queries(6):
+            response = client.get('/api/v1/titles/', {'facets': 'true'})
+        facets = response.json()['facets']
+        assert facets['genre'] == [
+            {'value': 'comedy', 'count': 2},
+            {'value': 'drama', 'count': 2},
+            {'value': 'horror', 'count': 1},
+        ], 'Проверьте подсчет произведений по жанрам'
+        assert facets['category'] == [
+            {'value': 'films', 'count': 2},
+            {'value': 'books', 'count': 1},
+        ], 'Проверьте подсчет произведений по категориям'
+        assert facets['year'] == [
+            {'value': 2000, 'count': 2},
+            {'value': 2020, 'count': 1},
+        ], 'Проверьте подсчет произведений по годам'
+
+        response = client.get('/api/v1/titles/', {'facets': 'genre,year', 'category': 'films'})
+        facets = response.json()['facets']
+        assert set(facets) == {'genre', 'year'}
+        assert facets['genre'] == [
+            {'value': 'comedy', 'count': 2},
+            {'value': 'drama', 'count': 1},
+            {'value': 'horror', 'count': 1},
+        ], 'Проверьте, что счетчики фасетов учитывают текущие фильтры'
+
+        response = client.get('/api/v1/titles/', {'facets': 'category', 'search': 'драма'})
+        assert response.json()['facets']['category'] == [
+            {'value': 'books', 'count': 1},
+            {'value': 'films', 'count': 1},
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_facets_with_search(self, client, admin_client):
+        create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Третий', 'year': 2000, 'genre': ['drama', 'comedy'],
+            'category': 'films', 'description': 'Ещё одна драма'
+        })
+
+        for facets in ('genre', 'all', '1'):
+            response = client.get('/api/v1/titles/', {'facets': facets, 'search': 'драма'})
+            assert response.status_code == 200, (
+                'Проверьте, что `?search=` можно совместить с фасетом жанров'
+            )
+            assert response.json()['facets']['genre'] == [
+                {'value': 'drama', 'count': 2},
+                {'value': 'comedy', 'count': 1},
+            ], 'Проверьте, что счетчики жанров учитывают поиск'
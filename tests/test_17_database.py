@@ -0,0 +1,20 @@
+import pytest
+
+
+class Test17Database:
+
+    @pytest.mark.django_db
+    def test_01_sqlite_pragmas(self, settings):
+        from django.db import connection
+
+        if connection.vendor != 'sqlite':
+            pytest.skip('Настройки PRAGMA применяются только к SQLite')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            assert cursor.fetchone()[0] == settings.SQLITE_PRAGMAS['busy_timeout'], (
+                'Проверьте, что при подключении к SQLite выставляется busy_timeout'
+            )
+            cursor.execute('PRAGMA synchronous')
+            assert cursor.fetchone()[0] == 1, (
+                'Проверьте, что при подключении к SQLite выставляется synchronous = NORMAL'
+            )
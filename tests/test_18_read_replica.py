@@ -0,0 +1,139 @@
+import sqlite3
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+
+def route(request, status=200):
+    from api.db_routers import reading_from_replica
+    from api.middleware import ReadReplicaMiddleware
+
+    routed = []
+
+    def get_response(request):
+        routed.append(reading_from_replica())
+        return HttpResponse(status=status)
+
+    ReadReplicaMiddleware(get_response)(request)
+    return routed[0]
+
+
+@pytest.fixture
+def replica(tmp_path):
+    """Реплика в отдельном файле SQLite; sync() догоняет основную базу."""
+    from django.db import connections
+
+    path = str(tmp_path / 'replica.sqlite3')
+
+    def sync():
+        connections['replica'].close()
+        connections['default'].ensure_connection()
+        target = sqlite3.connect(path)
+        connections['default'].connection.backup(target)
+        target.close()
+
+    connections.databases['replica'] = {**connections.databases['default'], 'NAME': path}
+    sync()
+    yield sync
+    connections['replica'].close()
+    del connections.databases['replica']
+    delattr(connections._connections, 'replica')
+
+
+class Test18ReadReplica:
+
+    def test_01_safe_methods_read_from_replica(self, settings):
+        from api.db_routers import reading_from_replica
+
+        settings.READ_REPLICA_ALIAS = 'default'
+        assert route(RequestFactory().get('/api/v1/titles/')) is True
+        settings.READ_REPLICA_ALIAS = 'replica'
+        assert route(RequestFactory().get('/api/v1/titles/')) is False, (
+            'Проверьте, что без настроенной реплики чтение идет из основной базы'
+        )
+        settings.READ_REPLICA_ALIAS = 'default'
+        factory = RequestFactory()
+        assert route(factory.get('/api/v1/titles/')) is True, (
+            'Проверьте, что GET запросы читают из реплики'
+        )
+        assert route(factory.post('/api/v1/titles/')) is False, (
+            'Проверьте, что запросы на запись работают с основной базой'
+        )
+        assert reading_from_replica() is False, (
+            'Проверьте, что после запроса чтение снова идет из основной базы'
+        )
+
+    def test_02_reads_are_pinned_after_write(self, settings):
+        from django.core.cache import cache
+
+        settings.READ_REPLICA_ALIAS = 'default'
+        factory = RequestFactory()
+        headers = {'HTTP_AUTHORIZATION': 'Bearer writer'}
+        assert route(factory.get('/api/v1/titles/', **headers)) is True
+
+        route(factory.post('/api/v1/titles/', **headers), status=400)
+        assert route(factory.get('/api/v1/titles/', **headers)) is True, (
+            'Проверьте, что неудачная запись не переключает чтение на основную базу'
+        )
+
+        route(factory.patch('/api/v1/titles/1/', **headers))
+        cache.clear()
+        assert route(factory.get('/api/v1/titles/', **headers)) is False, (
+            'Проверьте, что после записи тот же пользователь читает из основной базы '
+            'и закрепление хранится в общем кэше'
+        )
+        assert route(factory.get(
+            '/api/v1/titles/', HTTP_AUTHORIZATION='Bearer other'
+        )) is True, 'Проверьте, что закрепление не действует на других пользователей'
+
+    def test_03_router_uses_configured_alias(self, settings):
+        from api.db_routers import ReplicaRouter, _read_from_replica
+        from reviews.models import Title
+
+        router = ReplicaRouter()
+        token = _read_from_replica.set(True)
+        try:
+            assert router.db_for_read(Title) is None, (
+                'Проверьте, что без настроенной реплики чтение идет из основной базы'
+            )
+            settings.READ_REPLICA_ALIAS = 'default'
+            assert router.db_for_read(Title) == 'default'
+            assert router.db_for_write(Title) is None
+        finally:
+            _read_from_replica.reset(token)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_api_works_through_router(self, client, admin_client):
+        from .common import create_titles
+
+        create_titles(admin_client)
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200 and response.json()['count'] == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_lagging_replica(self, client, admin_client, replica, shared_cache):
+        from django.core.cache import cache
+
+        from api.middleware import RECENT_WRITE_KEY
+        from .common import create_titles
+
+        create_titles(admin_client)
+        url = '/api/v1/titles/'
+        response = client.get(url)
+        assert response.json()['count'] == 0, (
+            'Проверьте, что анонимные GET запросы читают из реплики'
+        )
+        assert client.get(url)['X-Cache'] == 'MISS', (
+            'Проверьте, что ответы реплики сразу после записи не попадают в кэш'
+        )
+        cache.clear()
+        assert admin_client.get(url).json()['count'] == 2, (
+            'Проверьте, что автор записи читает из основной базы '
+            'даже в другом процессе'
+        )
+
+        replica()
+        shared_cache.delete(RECENT_WRITE_KEY)
+        assert client.get(url).json()['count'] == 2
+        assert client.get(url)['X-Cache'] == 'HIT'
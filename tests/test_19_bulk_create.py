@@ -0,0 +1,122 @@
+import pytest
+
+from .common import auth_client, create_titles
+
+
+class Test19BulkCreate:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bulk_reviews_for_title(self, admin_client, admin, user):
+        from reviews.models import Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/bulk/'
+        response = admin_client.post(
+            url, data=[{'text': 'Отзыв', 'score': 4}], format='json'
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что POST запрос `/api/v1/titles/{title_id}/reviews/bulk/` '
+            'создает отзывы и возвращает статус 201'
+        )
+        data = response.json()
+        review = Review.objects.get(pk=data[0]['id'])
+        assert (review.author, review.title_id, review.score) == (admin, titles[0]['id'], 4)
+        assert data[0]['author'] == admin.username
+
+        response = auth_client(user).post(
+            url, data=[{'text': 'Отзыв', 'score': 8}], format='json'
+        )
+        assert response.status_code == 201
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.reviews_count, title.rating) == (2, 6.0), (
+            'Проверьте, что после пакетного создания отзывов пересчитывается рейтинг'
+        )
+
+        response = admin_client.post(
+            url, data=[{'text': 'Повтор', 'score': 5}], format='json'
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что пакетное создание не позволяет оставить второй отзыв'
+        )
+        assert Review.objects.count() == 2
+        assert admin_client.post(
+            '/api/v1/titles/999/reviews/bulk/', data=[], format='json'
+        ).status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_cross_title_reviews_errors_per_item(self, client, admin_client):
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        data = [
+            {'title': titles[0]['id'], 'text': 'Отзыв', 'score': 5},
+            {'title': titles[0]['id'], 'text': 'Повтор', 'score': 6},
+            {'title': 999, 'text': 'Нет произведения', 'score': 7},
+            {'title': titles[1]['id'], 'text': 'Оценка', 'score': 11},
+        ]
+        assert client.post(
+            '/api/v1/reviews/bulk/', data=data, content_type='application/json'
+        ).status_code == 401
+        response = admin_client.post('/api/v1/reviews/bulk/', data=data, format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[:3] == [
+            {},
+            {'non_field_errors': ['Вы уже оставляли отзыв к этому произведению.']},
+            {'title': ['Произведение не найдено.']},
+        ] and len(errors) == 4 and set(errors[3]) == {'score'}, (
+            'Проверьте, что ошибки полей и проверок по базе возвращаются '
+            'одним списком для каждого элемента'
+        )
+        assert Review.objects.count() == 0
+
+        response = admin_client.post('/api/v1/reviews/bulk/', data=data[1:2], format='json')
+        assert response.status_code == 201
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bulk_queries_do_not_depend_on_size(self, admin_client, admin,
+                                                   django_assert_max_num_queries):
+        from reviews.models import Category, Title
+
+        create_titles(admin_client)
+        category = Category.objects.first()
+        for number in range(20):
+            Title.objects.create(name=f'Произведение {number}', year=2000, category=category)
+        data = [
+            {'title': title.id, 'text': 'Отзыв', 'score': 7}
+            for title in Title.objects.all()
+        ]
+        with django_assert_max_num_queries(15):
+            response = admin_client.post('/api/v1/reviews/bulk/', data=data, format='json')
+        assert response.status_code == 201 and len(response.json()) == 22, (
+            'Проверьте, что число запросов к БД при пакетном создании '
+            'не зависит от количества отзывов'
+        )
+        ids = [review['id'] for review in response.json()]
+        assert len(set(ids)) == 22 and None not in ids
+        assert set(Title.objects.values_list('rating', flat=True)) == {7.0}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_bulk_comments(self, admin_client, admin):
+        from reviews.models import Comment, Review, Title
+
+        create_titles(admin_client)
+        title = Title.objects.first()
+        review = Review.objects.create(title=title, author=admin, text='Отзыв', score=5)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/bulk/'
+        response = admin_client.post(
+            url, data=[{'text': 'Первый'}, {'text': 'Второй'}], format='json'
+        )
+        assert response.status_code == 201
+        assert [comment['text'] for comment in response.json()] == ['Первый', 'Второй']
+        assert Comment.objects.filter(review=review, author=admin).count() == 2
+
+        response = admin_client.post(
+            '/api/v1/comments/bulk/',
+            data=[{'review': review.id, 'text': 'Третий'}, {'review': 999, 'text': 'x'}],
+            format='json',
+        )
+        assert response.status_code == 400 and response.json()[1] == {
+            'review': ['Отзыв не найден.']
+        }, 'Проверьте, что для несуществующего отзыва возвращается ошибка элемента'
+        assert Comment.objects.count() == 2
@@ -0,0 +1,123 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from .common import auth_client, create_categories, create_genre
+
+
+def genre_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "reviews_genre" WHERE "reviews_genre"."slug"' in query['sql']
+    ]
+
+
+class Test20BulkTitles:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bulk_titles(self, admin_client, user, django_assert_max_num_queries):
+        from reviews.models import Title
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        data = [
+            {
+                'name': f'Произведение {number}', 'year': 1990 + number,
+                'category': 'films' if number % 2 else 'books',
+                'genre': ['horror', 'drama'] if number % 3 else ['comedy'],
+            }
+            for number in range(30)
+        ]
+        url = '/api/v1/titles/bulk/'
+        assert auth_client(user).post(url, data=data, format='json').status_code == 403, (
+            'Проверьте, что пакетно создавать произведения может только администратор'
+        )
+        with django_assert_max_num_queries(12):
+            response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что POST запрос `/api/v1/titles/bulk/` создает произведения '
+            'за число запросов, не зависящее от их количества'
+        )
+        result = response.json()
+        assert len(result) == 30 and result[1]['genre'] == ['horror', 'drama']
+        assert result[3]['category'] == 'films'
+        title = Title.objects.get(pk=result[3]['id'])
+        assert sorted(title.genre.values_list('slug', flat=True)) == ['comedy']
+        assert title.category.slug == 'films'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bulk_titles_errors_per_item(self, admin_client):
+        from reviews.models import Title
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        data = [
+            {'name': 'Верное', 'year': 2000, 'category': 'films', 'genre': ['horror']},
+            {'name': 'Нет жанра', 'year': 2000, 'category': 'films', 'genre': ['unknown']},
+            {'name': 'Нет категории', 'year': 2000, 'category': 'unknown', 'genre': []},
+            {'name': 'Из будущего', 'year': 3000, 'category': 'films', 'genre': []},
+        ]
+        response = admin_client.post('/api/v1/titles/bulk/', data=data, format='json')
+        assert response.status_code == 400
+        assert response.json() == [
+            {},
+            {'genre': ['Жанр со slug=unknown не существует.']},
+            {'category': ['Категория со slug=unknown не существует.']},
+            {'year': ['Год должен быть не больше текущего.']},
+        ], (
+            'Проверьте, что все ошибки пакетного создания произведений '
+            'возвращаются по элементам в ответе на один запрос'
+        )
+        assert Title.objects.count() == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_title_genres_resolved_in_one_query(self, admin_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        data = {
+            'name': 'Поворот туда', 'year': 2000, 'category': 'films',
+            'genre': ['horror', 'comedy', 'drama'],
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 201
+        assert sorted(response.json()['genre']) == ['comedy', 'drama', 'horror']
+        assert len(genre_queries(context)) == 1, (
+            'Проверьте, что жанры произведения находятся по слагам одним запросом'
+        )
+        data['genre'] = ['horror', 'unknown']
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 400 and 'genre' in response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_admin_import(self, client, admin_client, user_superuser):
+        from reviews.models import Title
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        client.force_login(user_superuser)
+        url = '/admin/reviews/title/import/'
+        assert client.get(url).status_code == 200
+
+        content = (
+            'name,year,category,genre,description\n'
+            'Первое,2001,films,"horror, drama",Описание\n'
+            'Второе,2002,unknown,comedy,\n'
+        )
+        invalid = content + 'Третье,3000,books,comedy,\n'
+        response = client.post(url, {'file': SimpleUploadedFile('titles.csv', invalid.encode())})
+        page = response.content.decode()
+        assert response.status_code == 200 and 'Строка 3' in page and 'Строка 4' in page, (
+            'Проверьте, что импорт в админке сообщает об ошибках полей и слагов по строкам'
+        )
+        assert Title.objects.count() == 0
+
+        content = content.replace('unknown', 'books')
+        response = client.post(url, {'file': SimpleUploadedFile('titles.csv', content.encode())})
+        assert response.status_code == 302, (
+            'Проверьте, что импорт произведений в админке создает их из CSV'
+        )
+        title = Title.objects.get(name='Первое')
+        assert sorted(title.genre.values_list('slug', flat=True)) == ['drama', 'horror']
@@ -0,0 +1,54 @@
+import re
+
+import pytest
+
+from .common import auth_client, create_titles
+
+
+class Test21RequestMetrics:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_server_timing_header(self, client, admin_client):
+        create_titles(admin_client)
+        response = client.get('/api/v1/titles/')
+        timing = response['Server-Timing']
+        assert re.match(
+            r'db;dur=[\d.]+;desc="3 queries", ser;dur=[\d.]+, total;dur=[\d.]+$', timing
+        ), 'Проверьте, что ответ содержит заголовок `Server-Timing` с замерами БД'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_metrics_endpoint(self, client, admin_client, user):
+        from api import metrics
+
+        metrics.reset()
+        create_titles(admin_client)
+        for _ in range(3):
+            client.get('/api/v1/titles/')
+        url = '/api/v1/_metrics'
+        assert client.get(url).status_code == 401
+        assert auth_client(user).get(url).status_code == 403, (
+            'Проверьте, что метрики доступны только администратору'
+        )
+        response = admin_client.get(url)
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        body = response.content.decode()
+        assert 'api_request_duration_seconds_count{view="TitleViewSet.list"} 3' in body, (
+            'Проверьте, что метрики собираются по представлению и действию'
+        )
+        assert 'api_request_duration_seconds{view="TitleViewSet.create",quantile="0.99"}' in body
+        assert 'api_db_queries{view="TitleViewSet.list",quantile="0.5"} 0' in body
+        assert 'api_db_queries{view="TitleViewSet.list",quantile="0.99"} 3' in body, (
+            'Проверьте, что квантили считаются по замерам представления'
+        )
+        assert 'api_serializer_duration_seconds_sum{view="TitleViewSet.list"}' in body
+        assert re.search(r'api_cache_requests_total\{view="TitleViewSet",result="hit"\} \d+', body), (
+            'Проверьте, что метрики включают статистику кэша ответов'
+        )
+
+    def test_03_quantiles(self):
+        from api.metrics import quantile
+
+        values = list(range(1, 101))
+        assert [quantile(values, q) for q in (0.5, 0.95, 0.99)] == [50, 95, 99]
+        assert quantile([7], 0.99) == 7
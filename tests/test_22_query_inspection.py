@@ -0,0 +1,62 @@
+import logging
+
+import pytest
+
+from .common import create_titles
+from .test_09_query_count import create_more_titles
+
+
+@pytest.fixture
+def titles_without_prefetch(monkeypatch, admin_client):
+    from api.views import TitleViewSet
+    from reviews.models import Title
+
+    create_titles(admin_client)
+    create_more_titles(6)
+    monkeypatch.setattr(TitleViewSet, 'queryset', Title.objects.order_by('-id'))
+
+
+class Test22QueryInspection:
+
+    def test_01_normalize_sql(self):
+        from api.querylog import normalize_sql
+
+        assert normalize_sql(
+            'SELECT * FROM "t" WHERE "t"."id" IN (%s, %s, %s) AND "t"."name" = \'x\''
+        ) == normalize_sql(
+            'SELECT *  FROM "t" WHERE "t"."id" IN (1, 2) AND "t"."name" = \'it\'\'s\''
+        ) == 'SELECT * FROM "t" WHERE "t"."id" IN (...) AND "t"."name" = ?'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_nplusone_fails_tests(self, client, titles_without_prefetch):
+        from api.querylog import NPlusOneError
+
+        with pytest.raises(NPlusOneError) as error:
+            client.get('/api/v1/titles/')
+        message = str(error.value)
+        assert 'GET /api/v1/titles/' in message
+        assert 'TitleSerializer.genre' in message and 'TitleSerializer.category' in message, (
+            'Проверьте, что детектор N+1 указывает поле сериализатора'
+        )
+
+    @pytest.mark.allow_nplusone
+    @pytest.mark.django_db(transaction=True)
+    def test_03_nplusone_is_logged_when_allowed(self, client, caplog,
+                                                titles_without_prefetch):
+        with caplog.at_level(logging.WARNING, logger='api.queries'):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert any('N+1' in record.getMessage() for record in caplog.records), (
+            'Проверьте, что без NPLUSONE_RAISE найденный N+1 пишется в лог'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_slow_query_log(self, client, admin_client, caplog, settings):
+        create_titles(admin_client)
+        settings.SLOW_QUERY_MS = 0
+        with caplog.at_level(logging.WARNING, logger='api.queries'):
+            client.get('/api/v1/titles/')
+        messages = [record.getMessage() for record in caplog.records]
+        assert any(
+            message.startswith('Медленный запрос в GET /api/v1/titles/') for message in messages
+        ), 'Проверьте, что запросы дольше SLOW_QUERY_MS пишутся в лог'
@@ -0,0 +1,75 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+
+class Test23GenerateData:
+
+    def test_01_zipf_counts(self):
+        from reviews.management.commands.generate_data import zipf_counts
+
+        counts = zipf_counts(1000, 50, 1.1, 100)
+        assert sum(counts) == 1000 and max(counts) == 100, (
+            'Проверьте, что отзывы распределяются по Ципфу с ограничением сверху'
+        )
+        assert counts[0] >= counts[10] >= counts[-1]
+        assert zipf_counts(20, 4, 1.0, 5) == [5, 5, 5, 5]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_generate_into_database(self):
+        from django.db.models import Count
+        from reviews.models import Comment, Review, Title, User
+
+        User.objects.create(username='existing', email='existing@yamdb.fake')
+        call_command(
+            'generate_data', users=30, titles=40, reviews=300, comments=200,
+            batch_size=50, stdout=io.StringIO(),
+        )
+        assert User.objects.count() == 31 and Title.objects.count() == 40
+        assert Review.objects.count() == 300 and Comment.objects.count() == 200, (
+            'Проверьте, что команда `generate_data` создает заданное число строк'
+        )
+        per_title = sorted(
+            Title.objects.annotate(total=Count('reviews')).values_list('total', flat=True),
+            reverse=True,
+        )
+        assert per_title[0] > 3 * per_title[len(per_title) // 2], (
+            'Проверьте, что отзывы распределены по произведениям неравномерно'
+        )
+        assert all(title.genre.exists() for title in Title.objects.all())
+        title = Title.objects.order_by('-reviews_count').first()
+        assert title.reviews_count == per_title[0] and title.rating is not None, (
+            'Проверьте, что после генерации пересчитывается рейтинг'
+        )
+
+        call_command('generate_data', users=5, titles=5, reviews=10, comments=5,
+                     stdout=io.StringIO())
+        assert Title.objects.count() == 45, (
+            'Проверьте, что повторная генерация дополняет существующие данные'
+        )
+        Review.objects.create(
+            title=title, author=User.objects.create(username='new', email='new@yamdb.fake'),
+            text='Отзыв', score=5,
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_generate_csv_for_import(self, tmp_path):
+        from reviews.models import Review, Title
+
+        call_command(
+            'generate_data', users=10, titles=10, reviews=50, comments=20,
+            output=str(tmp_path), stdout=io.StringIO(),
+        )
+        assert Title.objects.count() == 0
+        call_command('import_csv', path=str(tmp_path), stdout=io.StringIO())
+        assert Title.objects.count() == 10 and Review.objects.count() == 50, (
+            'Проверьте, что CSV из `generate_data` загружаются командой `import_csv`'
+        )
+
+    def test_04_too_many_reviews(self):
+        from django.core.management.base import CommandError
+
+        with pytest.raises(CommandError):
+            call_command('generate_data', users=2, titles=2, reviews=5,
+                         output='unused', stdout=io.StringIO())
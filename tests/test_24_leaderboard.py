@@ -0,0 +1,124 @@
+import pytest
+
+from .common import create_titles
+
+
+def create_reviews_for(title, scores, prefix):
+    from reviews.models import Review, User
+
+    for number, score in enumerate(scores):
+        author = User.objects.create(
+            username=f'{prefix}{number}', email=f'{prefix}{number}@yamdb.fake'
+        )
+        Review.objects.create(title=title, author=author, text='Отзыв', score=score)
+
+
+class Test24Leaderboard:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_top_titles(self, client, admin_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        single, popular = (Title.objects.get(pk=title['id']) for title in titles)
+        create_reviews_for(single, [10], 'single')
+        create_reviews_for(popular, [8] * 20, 'popular')
+
+        response = client.get('/api/v1/titles/top/')
+        assert response.status_code == 200
+        result = response.json()
+        assert [title['id'] for title in result] == [popular.id, single.id], (
+            'Проверьте, что `/api/v1/titles/top/` учитывает число отзывов: '
+            'одна высокая оценка не поднимает произведение на первое место'
+        )
+        assert result[0]['weighted_rating'] == pytest.approx((160 + 55) / 30)
+        assert result[1]['weighted_rating'] == pytest.approx((10 + 55) / 11)
+        assert result[0]['reviews_count'] == 20 and result[0]['rating'] == 8
+        assert [genre['slug'] for genre in result[1]['genre']] == ['horror', 'comedy']
+
+        response = client.get('/api/v1/titles/top/', {'genre': 'horror'})
+        assert [title['id'] for title in response.json()] == [single.id], (
+            'Проверьте, что `/api/v1/titles/top/?genre=` возвращает '
+            'лидеров одного жанра'
+        )
+        response = client.get('/api/v1/titles/top/', {'category': 'books'})
+        assert [title['id'] for title in response.json()] == [popular.id]
+        response = client.get('/api/v1/titles/top/', {'year': 2000})
+        assert [title['id'] for title in response.json()] == [single.id]
+        response = client.get('/api/v1/titles/top/', {'order': 'reviews', 'limit': 1})
+        assert [title['id'] for title in response.json()] == [popular.id]
+        response = client.get('/api/v1/titles/top/', {'fields': 'id,reviews_count'})
+        assert response.json() == [
+            {'id': popular.id, 'reviews_count': 20},
+            {'id': single.id, 'reviews_count': 1},
+        ], 'Проверьте, что `/api/v1/titles/top/?fields=` возвращает только перечисленные поля'
+
+        assert client.get('/api/v1/titles/top/', {'genre': 'unknown'}).status_code == 404
+        for params in (
+            {'genre': 'horror', 'year': 2000}, {'limit': 1000}, {'order': 'name'},
+            {'fields': 'id,secret'}, {'expand': 'genre'},
+        ):
+            assert client.get('/api/v1/titles/top/', params).status_code == 400, (
+                'Проверьте, что `/api/v1/titles/top/` отклоняет неверные параметры'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rankings_follow_writes(self, client, admin_client):
+        from reviews.models import Genre, Review, Title, TitleRanking
+
+        titles, _, _ = create_titles(admin_client)
+        single, popular = (Title.objects.get(pk=title['id']) for title in titles)
+        create_reviews_for(single, [10], 'single')
+        create_reviews_for(popular, [2, 3], 'popular')
+        url = '/api/v1/titles/top/'
+        assert [title['id'] for title in client.get(url).json()] == [single.id, popular.id]
+
+        Review.objects.filter(title=single).get().delete()
+        assert [title['id'] for title in client.get(url).json()] == [single.id, popular.id]
+        create_reviews_for(single, [1, 1, 1], 'low')
+        assert [title['id'] for title in client.get(url).json()] == [popular.id, single.id], (
+            'Проверьте, что таблица лидеров обновляется при изменении отзывов'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{popular.id}/', data={'genre': ['horror']}
+        )
+        response = client.get(url, {'genre': 'horror'})
+        assert [title['id'] for title in response.json()] == [popular.id, single.id], (
+            'Проверьте, что таблица лидеров жанра обновляется при смене жанров'
+        )
+        assert client.get(url, {'genre': 'drama'}).json() == []
+
+        Genre.objects.get(slug='comedy').delete()
+        assert not TitleRanking.objects.filter(scope='genre').exclude(
+            scope_key__in=Genre.objects.values('pk')
+        ).exists()
+
+        stored = sorted(TitleRanking.objects.values_list(
+            'scope', 'scope_key', 'title_id', 'reviews_count', 'weighted_rating'
+        ))
+        TitleRanking.objects.rebuild()
+        assert sorted(TitleRanking.objects.values_list(
+            'scope', 'scope_key', 'title_id', 'reviews_count', 'weighted_rating'
+        )) == stored, (
+            'Проверьте, что инкрементальные обновления совпадают с полной пересборкой'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_queries_do_not_depend_on_limit(self, client, admin_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from .test_09_query_count import create_more_titles
+
+        create_titles(admin_client)
+        create_more_titles(20)
+        counts = []
+        for limit in (1, 22):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get('/api/v1/titles/top/', {'limit': limit})
+            assert len(response.json()) == limit
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1], (
+            'Проверьте, что число запросов `/api/v1/titles/top/` не зависит от limit'
+        )
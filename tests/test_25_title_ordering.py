@@ -0,0 +1,68 @@
+import pytest
+
+from .common import create_titles
+
+
+def result_ids(response):
+    assert response.status_code == 200
+    return [title['id'] for title in response.json()['results']]
+
+
+class Test25TitleOrdering:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_ordering(self, client, admin_client):
+        from reviews.models import Category, Review, Title, User
+
+        create_titles(admin_client)
+        category = Category.objects.first()
+        for name, year in (('Альфа', 1990), ('Бета', 2000), ('Вега', 2000)):
+            Title.objects.create(name=name, year=year, category=category)
+        titles = {title.name: title.id for title in Title.objects.all()}
+        authors = [
+            User.objects.create(username=f'author{number}', email=f'author{number}@yamdb.fake')
+            for number in range(3)
+        ]
+        for name, scores in (('Альфа', [9, 9]), ('Бета', [4]), ('Вега', [9, 9, 9])):
+            for author, score in zip(authors, scores):
+                Review.objects.create(
+                    title_id=titles[name], author=author, text='Отзыв', score=score
+                )
+
+        url = '/api/v1/titles/'
+        ids = result_ids(client.get(url, {'ordering': '-rating'}))
+        assert ids[:3] == [titles['Вега'], titles['Альфа'], titles['Бета']], (
+            'Проверьте, что `/api/v1/titles/?ordering=-rating` сортирует по рейтингу, '
+            'а при равном рейтинге по убыванию id'
+        )
+        ids = result_ids(client.get(url, {'ordering': 'year'}))
+        assert ids[:3] == [titles['Альфа'], titles['Поворот туда'], titles['Бета']], (
+            'Проверьте, что при равных значениях порядок задается id'
+        )
+        ids = result_ids(client.get(url, {'ordering': '-year'}))
+        assert ids[:2] == [titles['Проект'], titles['Вега']]
+        ids = result_ids(client.get(url, {'ordering': 'name'}))
+        assert ids == [titles[name] for name in sorted(titles)]
+        ids = result_ids(client.get(url, {'ordering': '-reviews_count'}))
+        assert ids[:3] == [titles['Вега'], titles['Альфа'], titles['Бета']]
+
+        ids = result_ids(client.get(url, {'ordering': '-rating', 'year': 2000}))
+        assert ids == [titles['Вега'], titles['Бета'], titles['Поворот туда']], (
+            'Проверьте, что `?ordering=` работает вместе с фильтрами'
+        )
+        assert result_ids(client.get(url, {'ordering': 'description'})) == result_ids(
+            client.get(url)
+        ), 'Проверьте, что сортировка по неразрешенному полю игнорируется'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ordering_with_cursor_pagination(self, client, admin_client):
+        create_titles(admin_client)
+        response = client.get(
+            '/api/v1/titles/', {'ordering': 'name', 'pagination': 'cursor'}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` '
+            'не принимает параметр `ordering`'
+        )
+        response = client.get('/api/v1/titles/', {'pagination': 'cursor'})
+        assert response.status_code == 200
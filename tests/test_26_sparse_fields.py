@@ -0,0 +1,86 @@
+import pytest
+
+from .common import create_comments, create_titles
+
+
+def capture(client, url, params):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == 200, response.content
+    return response.json(), [query['sql'] for query in context.captured_queries]
+
+
+class Test26SparseFields:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_fields(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        data, queries = capture(client, url, {'fields': 'id,name,rating'})
+        assert [set(title) for title in data['results']] == [{'id', 'name', 'rating'}] * 2, (
+            'Проверьте, что `/api/v1/titles/?fields=` возвращает только перечисленные поля'
+        )
+        assert len(queries) == 2 and not any(
+            'reviews_category' in sql or 'reviews_genre' in sql or '"description"' in sql
+            for sql in queries
+        ), (
+            'Проверьте, что при `?fields=` не загружаются описание, категория и жанры'
+        )
+
+        data, queries = capture(client, url, {'fields': 'id'})
+        assert data['results'][0] == {'id': titles[1]['id']}
+        assert not any('"reviews_title"."name"' in sql for sql in queries)
+
+        data, queries = capture(client, url, {'fields': 'id,name,genre'})
+        assert set(data['results'][0]) == {'id', 'name', 'genre'}
+        assert data['results'][0]['genre'][0].keys() == {'name', 'slug'}
+        assert len(queries) == 3 and not any('reviews_category' in sql for sql in queries)
+
+        data, _ = capture(client, f'{url}{titles[0]["id"]}/', {'fields': 'name,category'})
+        assert data == {'name': titles[0]['name'], 'category': {'name': 'Фильм', 'slug': 'films'}}
+
+        assert set(client.get(url).json()['results'][0]) == {
+            'id', 'name', 'year', 'rating', 'description', 'category', 'genre'
+        }, 'Проверьте, что без `?fields=` ответ не меняется'
+        for params in ({'fields': 'id,secret'}, {'expand': 'author'}, {'expand': 'genre'}):
+            assert client.get(url, params).status_code == 400, (
+                'Проверьте, что неизвестные поля в `?fields=` и `?expand=` отклоняются'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_and_comments_fields(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        data, queries = capture(client, url, {'fields': 'id,score'})
+        assert set(data['results'][0]) == {'id', 'score'}
+        assert not any('reviews_user' in sql for sql in queries), (
+            'Проверьте, что без поля `author` авторы отзывов не загружаются'
+        )
+
+        data, queries = capture(client, url, {'fields': 'text', 'expand': 'author'})
+        assert set(data['results'][0]) == {'text', 'author'}
+        assert set(data['results'][0]['author']) == {
+            'username', 'first_name', 'last_name', 'bio'
+        }, 'Проверьте, что `?expand=author` раскрывает автора отзыва'
+        assert len(queries) == 3
+
+        data, _ = capture(client, f'{url}{reviews[0]["id"]}/', {'expand': 'author'})
+        assert set(data) == {'id', 'text', 'author', 'score', 'pub_date'}
+        assert isinstance(data['author'], dict)
+
+        data, _ = capture(
+            client, f'{url}{reviews[0]["id"]}/comments/',
+            {'fields': 'id,author', 'pagination': 'cursor'},
+        )
+        assert data['results'] and all(
+            set(comment) == {'id', 'author'} and isinstance(comment['author'], str)
+            for comment in data['results']
+        ), 'Проверьте, что `?fields=` работает для комментариев'
+        assert client.get(
+            f'{url}{reviews[0]["id"]}/comments/', {'expand': 'review'}
+        ).status_code == 400